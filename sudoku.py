@@ -3,7 +3,13 @@
 # Sudoku CSP Solver
 #################################
 
-import numpy as np
+import argparse
+import sys
+import time
+from sudoku_solver import Solver, VARIANTS, STATUSES, SOLVED
+from sudoku_io import readpuzzles, formatpuzzle, solvestream
+from sudoku_cache import CachedSolver
+from sudoku_events import CounterSink, BinaryTraceSink, FanoutSink
 
 # Sudoku Grid 9x9
 GRIDSIZE = 9
@@ -23,6 +29,16 @@ global backtrackcounter
 # Distinguish between above cases 1/2 so it would be possible to undo effects of foward checking without losing invalid info from other sources
 global invalidmatrix
 
+# trail: undo log of invalidmatrix - every entry set from 0 to 1 or 2 during the search is appended as [r, c, k]
+# Entries are only ever set while they are 0, so a decision undoes exactly what it and everything below it set by
+# resetting the entries appended since it started (undotrail) to 0, without rescanning its row and column
+global trail
+
+# rowsupport[r][k] / colsupport[c][k]: number of entries invalidmatrix[r][*][k] / invalidmatrix[*][c][k] that are 0
+# Kept up to date by markentry and undotrail so the least constraining value heuristic reads them instead of counting
+global rowsupport
+global colsupport
+
 # Maximum iterations allowed before termination with failure
 global maxiter
 # Flag to to ensure initial setup of foward checking matrix only run once
@@ -35,9 +51,49 @@ callcounter = 0
 backtrackcounter = 0
 maxiter = 10000
 firsttimeflag = 1
-invalidmatrix = np.zeros((GRIDSIZE, GRIDSIZE, GRIDSIZE))
+# allocated by the first forward checking solve (newinvalidmatrix), so importing this module does not load numpy
+invalidmatrix = None
+trail = []
+rowsupport = []
+colsupport = []
 solution = []
 
+### newinvalidmatrix Helper Function ###
+# Zeroed 9x9x9 invalidmatrix, numpy is only imported here when a forward checking version first runs
+def newinvalidmatrix():
+	import numpy as np
+	return np.zeros((GRIDSIZE, GRIDSIZE, GRIDSIZE))
+
+### markentry / undotrail Helper Functions ###
+# set invalidmatrix[r][c][k] (currently 0) to mark (1 or 2) and append it to trail
+def markentry(r, c, k, mark):
+	invalidmatrix[r][c][k] = mark
+	trail.append([r, c, k])
+	rowsupport[r][k] -= 1
+	colsupport[c][k] -= 1
+
+# reset the invalidmatrix entries appended to trail since its length was checkpoint back to 0, newest first
+def undotrail(checkpoint):
+	while len(trail) > checkpoint:
+		r, c, k = trail.pop()
+		invalidmatrix[r][c][k] = 0
+		rowsupport[r][k] += 1
+		colsupport[c][k] += 1
+
+### countsupport Helper Function ###
+# count rowsupport and colsupport from invalidmatrix (once, after the initial conflicts are set up)
+def countsupport():
+	global rowsupport
+	global colsupport
+	rowsupport = [[0] * GRIDSIZE for r in range(GRIDSIZE)]
+	colsupport = [[0] * GRIDSIZE for c in range(GRIDSIZE)]
+	for r in range(GRIDSIZE):
+		for c in range(GRIDSIZE):
+			for k in range(GRIDSIZE):
+				if invalidmatrix[r][c][k] == 0:
+					rowsupport[r][k] += 1
+					colsupport[c][k] += 1
+
 ### findnextzero Helper Fucntion - Basic Version ###
 # Function to locate next unassigned cell (with value zero) to try and fill
 # Used by the basic Sudoku solver and forward checking solvers
@@ -171,20 +227,19 @@ def findnextvalidfwdcheck(puzzle, pointtocheck):
 		if badaflag == 0:
 			assignment = test
 			test = 10
-		else:
-			invalidmatrix[pointtocheck[0]][pointtocheck[1]][test-1] = 1
+		elif invalidmatrix[pointtocheck[0]][pointtocheck[1]][test-1] == 0:
+			markentry(pointtocheck[0], pointtocheck[1], test-1, 1)
 	return assignment
 
-### findnextvalid - Improved Version for Sudoku solver using forward checking and least constraining value heuristic ###
-def findnextvalidheuristics(puzzle, pointtocheck):
-	global callcounter
-	global backtrackcounter
-	global invalidmatrix
-	assignment = 0
+### ordervalid - Improved Version for Sudoku solver using forward checking and least constraining value heuristic ###
+# Instead of finding one valid digit per call this returns every valid digit for pointtocheck, ordered once for the node
+# Least constraining value heuristic: a digit left open (0 in invalidmatrix) in fewer entries on the same row and column
+# as pointtocheck rules out fewer choices of other cells, so the digits go from fewest open entries to most (lowest digit first on ties)
+# The open entries are rowsupport + colsupport, no scan of the row and column needed
+# Backtracking to this node undoes everything below it, so the order stays right for every digit the node tries
+def ordervalidheuristics(puzzle, pointtocheck):
+	valid = []
 	test = 0
-	badaflag = 0
-	# minconflicts introduced for least constraining value heuristic, 1000 is default so first valid choice will do better than it always
-	minconflicts = 1000
 	while test <= 8:
 		test += 1
 		badaflag = 0
@@ -202,18 +257,11 @@ def findnextvalidheuristics(puzzle, pointtocheck):
 					badaflag = 1
 					break;
 		if badaflag == 0:
-			testconflicts = 0
-			# Least constraining value heuristic: only choose assignment if the number of unassigned cells (with value 0) on the same row or column as pointtocheck is less than our current best
-			for i in range(GRIDSIZE):
-				if invalidmatrix[i][pointtocheck[1]][test-1] == 0:
-					testconflicts += 1
-				if invalidmatrix[pointtocheck[0]][i][test-1] == 0:
-					testconflicts += 1
-			if testconflicts < minconflicts: 
-				assignment = test
-		else:
-			invalidmatrix[pointtocheck[0]][pointtocheck[1]][test-1] = 1
-	return assignment
+			valid.append([rowsupport[pointtocheck[0]][test-1] + colsupport[pointtocheck[1]][test-1], test])
+		elif invalidmatrix[pointtocheck[0]][pointtocheck[1]][test-1] == 0:
+			markentry(pointtocheck[0], pointtocheck[1], test-1, 1)
+	valid.sort()
+	return [test for conflicts, test in valid]
 
 ### Sudoku Solver Main Function - Basic Backtracking Search Version ###
 # puzzle is the grid and nextzero is the first row to check for unassigned cells (used to save some unneccesary checking in findnextzero)
@@ -269,9 +317,12 @@ def sudokusolvefwdcheck(puzzle, nextzero):
 	global invalidmatrix
 	global maxiter
 	global firsttimeflag
+	global trail
 	global solution
 	# this section initializes our invalidmatrix for forward checking with info on conflicts already present with initial values given in puzzle - only call this once
 	if firsttimeflag == 1:
+		if invalidmatrix is None:
+			invalidmatrix = newinvalidmatrix()
 		for r in range(GRIDSIZE):
 			for c in range (GRIDSIZE):
 				pretest = puzzle[r][c]
@@ -280,6 +331,8 @@ def sudokusolvefwdcheck(puzzle, nextzero):
 						invalidmatrix[r][i][pretest-1] = 1
 					for j in range(GRIDSIZE):
 						invalidmatrix[j][c][pretest-1] = 1
+		trail = []
+		countsupport()
 		firsttimeflag = 0
 	# find next unassigned cell, nextptr (next point row) and nextptc (next point column) are row/column of cell found by findnextzero
 	nextpt = findnextzero(puzzle, nextzero)
@@ -288,15 +341,16 @@ def sudokusolvefwdcheck(puzzle, nextzero):
 	if nextptr == -1 and nextptc == -1:
 		solution = puzzle
 		return 0
-	# this flag will flip and break the while loop if the current cell's invalid vector is all -1 (same as in basic version)
-	flaginvalidallnegative = 0
-	while flaginvalidallnegative == 0:
+	# the loop only ends by returning: a solution (0), no valid digit left for the cell (-1) or max iterations (-2)
+	while True:
 		maxiter -= 1
 		if maxiter == 0:
 			return -2
 		assignment = findnextvalidfwdcheck(puzzle, nextpt)
 		puzzle[nextpt[0]][nextpt[1]] = assignment
 		forwardcheckingflag = 0
+		# trail length before the forward checking of this assignment
+		checkpoint = len(trail)
 
 		# go through the invalidmatrix updating conflicts resulting from last assignment over all cells sharing row/column as current cell
 		# (using value 2 instead of 1 so we can safely undo this as needed in algorithm without losing other info)
@@ -304,7 +358,7 @@ def sudokusolvefwdcheck(puzzle, nextzero):
 			for c in range(GRIDSIZE):
 				if c != nextptc and puzzle[nextptr][c] == 0:
 					if invalidmatrix[nextptr][c][assignment-1] == 0:
-						invalidmatrix[nextptr][c][assignment-1] = 2
+						markentry(nextptr, c, assignment-1, 2)
 					# after updating invalidmatrix check cells on same row (same column in next block) as updated cell again
 					# if there are no longer any valid assignments then flip fowardcheckingflag
 					# to indicate later updated cell's assignment leads to another cell having no valid assignments of digits and so it is in turn invalid
@@ -319,17 +373,15 @@ def sudokusolvefwdcheck(puzzle, nextzero):
 				for r in range(GRIDSIZE):
 					if r != nextptr and puzzle[r][nextptc] == 0:
 						if invalidmatrix[r][nextptc][assignment-1] == 0:
-							invalidmatrix[r][nextptc][assignment-1] = 2
+							markentry(r, nextptc, assignment-1, 2)
 						anyavailiable = 0
 						for l in range(GRIDSIZE):
 							if invalidmatrix[r][nextptc][l] == 0:
 								anyavailiable = 1
 						if anyavailiable == 0:
 							forwardcheckingflag = 1
+		# no valid digit, the marks made on this cell are taken back by the parent's undotrail
 		if assignment == 0:
-			for i in range(GRIDSIZE):
-				invalidmatrix[nextptr][nextptc][i] = 0
-
 			return -1
 		else:
 			callresult = -10
@@ -343,32 +395,26 @@ def sudokusolvefwdcheck(puzzle, nextzero):
 					return -2
 			# if either the fowardchecking failed (i.e. assignment not valid because other cell no longer has any valid assignments)
 			# or child sudokusolve returned -1 meaning it found no valid assignments
-			# then undo effects of forward checking (reset 2 to 0 in invalidmatrix for cells sharing row or column) if applicable
+			# then undo effects of forward checking and everything the child set (every invalidmatrix entry set since checkpoint)
 			# then mark the choice we made as invalid and try again with a different digit
 			if(callresult == -1 or forwardcheckingflag == 1):
-				for c in range(GRIDSIZE):
-					if invalidmatrix[nextptr][c][assignment-1] == 2:
-						invalidmatrix[nextptr][c][assignment-1] = 0
-				for r in range(GRIDSIZE):
-					if invalidmatrix[r][nextptc][assignment-1] == 2:
-						invalidmatrix[r][nextptc][assignment-1] = 0
-				invalidmatrix[nextptr][nextptc][assignment-1] = 1
+				undotrail(checkpoint)
+				markentry(nextptr, nextptc, assignment-1, 1)
 				backtrackcounter += 1
-		flaginvalidallnegative = 1
-		for i in range(GRIDSIZE):
-			if invalidmatrix[nextptr][nextptc][i] != -1:
-				flaginvalidallnegative = 0
 
 ### Sudoku Solver - Final Version with Fowarding Checking and using least constrained value, most constrained variable and most constraining variable heuristics ###
-# Same as previous version but calls the improved findnextzeroheuristics and findnextvalidheuristics
+# Same as previous version but calls the improved findnextzeroheuristics, and takes the digits to try in the order ordervalidheuristics gives once per cell
 def sudokusolveheuristics(puzzle):
 	global callcounter
 	global backtrackcounter
 	global invalidmatrix
 	global maxiter
 	global firsttimeflag
+	global trail
 	global solution
 	if firsttimeflag == 1:
+		if invalidmatrix is None:
+			invalidmatrix = newinvalidmatrix()
 		for r in range(GRIDSIZE):
 			for c in range (GRIDSIZE):
 				pretest = puzzle[r][c]
@@ -377,6 +423,8 @@ def sudokusolveheuristics(puzzle):
 						invalidmatrix[r][i][pretest-1] = 1
 					for j in range(GRIDSIZE):
 						invalidmatrix[j][c][pretest-1] = 1
+		trail = []
+		countsupport()
 		firsttimeflag = 0
 	nextpt = findnextzeroheuristics(puzzle)
 	nextptr = nextpt[0]
@@ -384,20 +432,22 @@ def sudokusolveheuristics(puzzle):
 	if nextptr == -1 and nextptc == -1:
 		solution = puzzle
 		return 0
-	flaginvalidallnegative = 0
-	while flaginvalidallnegative == 0:
+	candidates = iter(ordervalidheuristics(puzzle, nextpt))
+	while True:
 		maxiter -= 1
 		if maxiter == 0:
 			return -2
-		assignment = findnextvalidheuristics(puzzle, nextpt)
+		assignment = next(candidates, 0)
 		puzzle[nextpt[0]][nextpt[1]] = assignment
 		forwardcheckingflag = 0
+		# trail length before the forward checking of this assignment
+		checkpoint = len(trail)
 
 		if assignment != 0:
 			for c in range(GRIDSIZE):
 				if c != nextptc and puzzle[nextptr][c] == 0:
 					if invalidmatrix[nextptr][c][assignment-1] == 0:
-						invalidmatrix[nextptr][c][assignment-1] = 2
+						markentry(nextptr, c, assignment-1, 2)
 					anyavailiable = 0
 					for l in range(GRIDSIZE):
 						if invalidmatrix[nextptr][c][l] == 0:
@@ -409,17 +459,15 @@ def sudokusolveheuristics(puzzle):
 				for r in range(GRIDSIZE):
 					if r != nextptr and puzzle[r][nextptc] == 0:
 						if invalidmatrix[r][nextptc][assignment-1] == 0:
-							invalidmatrix[r][nextptc][assignment-1] = 2
+							markentry(r, nextptc, assignment-1, 2)
 						anyavailiable = 0
 						for l in range(GRIDSIZE):
 							if invalidmatrix[r][nextptc][l] == 0:
 								anyavailiable = 1
 						if anyavailiable == 0:
 							forwardcheckingflag = 1
+		# no valid digit, the marks made on this cell are taken back by the parent's undotrail
 		if assignment == 0:
-			for i in range(GRIDSIZE):
-				invalidmatrix[nextptr][nextptc][i] = 0
-
 			return -1
 		else:
 			callresult = -10
@@ -431,41 +479,102 @@ def sudokusolveheuristics(puzzle):
 				elif callresult == -2:
 					return -2
 			if(callresult == -1 or forwardcheckingflag == 1):
-				for c in range(GRIDSIZE):
-					if invalidmatrix[nextptr][c][assignment-1] == 2:
-						invalidmatrix[nextptr][c][assignment-1] = 0
-				for r in range(GRIDSIZE):
-					if invalidmatrix[r][nextptc][assignment-1] == 2:
-						invalidmatrix[r][nextptc][assignment-1] = 0
-				invalidmatrix[nextptr][nextptc][assignment-1] = 1
+				undotrail(checkpoint)
+				markentry(nextptr, nextptc, assignment-1, 1)
 				backtrackcounter += 1
-		flaginvalidallnegative = 1
-		for i in range(GRIDSIZE):
-			if invalidmatrix[nextptr][nextptc][i] != -1:
-				flaginvalidallnegative = 0
-
-# Read puzzle.sd and run sudokusolve on it below, printing solution
-grid = []
-with open('puzzle.sd') as f:
-	for i in range(GRIDSIZE):
-		grid.append(next(f))
-		row = []
-		row = (grid[i]).split()
-		for j in range(GRIDSIZE):
-			row[j] = int(row[j])
-		grid[i] = row
-
-# Find first unassigned cell to start at - only needed for first two versions of Sudoku Solve
-firstnextzero = findnextzero(grid, 0)
-
-# Run Basic Sudoku Solve
-#result = sudokusolve(grid, firstnextzero[0])
-
-# Run Sudoku Solve with Forward Checking
-#result = sudokusolvefwdcheck(grid, firstnextzero[0])
-
-# Run Sudoku Solve with Foward Checking and Heuristics
-result = sudokusolveheuristics(grid)
-for printindex in range(GRIDSIZE):
-	print(solution[printindex])
 
+### Command Line ###
+# Solves every puzzle of a file or of stdin as it is read, writing each solution (or the puzzle itself if it is not
+# solved) to stdout in the format it came in, and the counts of every status, variable assignments and backtracks to stderr
+# Formats and parsing are in sudoku_io.py, memory use does not grow with the number of puzzles
+# usage: python sudoku.py [puzzle.sd | - ] [--variant heuristics] [--maxiter 10000] [--timeout seconds] [--format auto] [--batch N] [--cache N] [--trace file] [--every N]
+#
+# Solver (sudoku_solver.py) runs the same three versions as above on the bitset domain engine with its own counters
+# Unlike the global versions above it also enforces the box constraint (Solver(..., boxes=False) gives the same
+# number of variable assignments/backtracks as the global versions)
+
+# the (kind, grid, result) of records, solved batchsize puzzles at a time by sudoku_batch.py
+# (a batch also ends where the grid size changes)
+def solvebatches(records, batchsize, maxiter):
+	# imported here, sudoku_batch needs numpy
+	from sudoku_batch import solvebatch
+	batch = []
+	for record in records:
+		if len(batch) > 0 and (len(batch) == batchsize or len(record[1]) != len(batch[0][1])):
+			for (kind, grid), result in zip(batch, solvebatch([grid for kind, grid in batch], maxiter)):
+				yield kind, grid, result
+			batch = []
+		batch.append(record)
+	if len(batch) > 0:
+		for (kind, grid), result in zip(batch, solvebatch([grid for kind, grid in batch], maxiter)):
+			yield kind, grid, result
+
+def main():
+	parser = argparse.ArgumentParser(description='Solve a stream of sudoku puzzles (.sd grids or 81 character lines)')
+	parser.add_argument('path', nargs='?', default='puzzle.sd', help="puzzle file, - for stdin")
+	parser.add_argument('--variant', default='heuristics', choices=VARIANTS)
+	parser.add_argument('--maxiter', type=int, default=10000)
+	parser.add_argument('--timeout', type=float, default=None, help='seconds allowed per puzzle')
+	parser.add_argument('--format', default='auto', choices=['auto', 'line', 'grid'],
+		help='output format, auto writes every puzzle in the format it was read in')
+	parser.add_argument('--batch', type=int, default=0,
+		help='solve N puzzles at a time with the NumPy batch solver (propagation then search) instead of --variant')
+	parser.add_argument('--cache', type=int, default=0,
+		help='keep the solutions of the last N puzzles up to symmetry (sudoku_cache.py) in front of the solver')
+	parser.add_argument('--trace', help='write the search events (sudoku_events.py) to this binary trace file')
+	parser.add_argument('--every', type=int, default=0, help='write the running counts to stderr every N puzzles')
+	args = parser.parse_args()
+
+	if args.path == '-':
+		stream = sys.stdin.buffer
+	else:
+		stream = open(args.path, 'rb')
+	records = readpuzzles(stream)
+	if args.batch > 0:
+		results = solvebatches(records, args.batch, args.maxiter)
+	else:
+		sink = None
+		if args.trace is not None:
+			counter = CounterSink()
+			trace = BinaryTraceSink(args.trace)
+			sink = FanoutSink([counter, trace])
+		solver = Solver(args.variant, args.maxiter, sink=sink, timeout=args.timeout)
+		if args.cache > 0:
+			solver = CachedSolver(solver, args.cache)
+		results = solvestream(records, solver)
+	out = sys.stdout
+	counts = dict((status, 0) for status in STATUSES.values())
+	assignments = 0
+	backtracks = 0
+	solved = 0
+	start = time.perf_counter()
+	for kind, grid, result in results:
+		if args.format != 'auto':
+			kind = args.format
+		if result.status == SOLVED:
+			out.write(formatpuzzle(result.solution, kind))
+		else:
+			out.write(formatpuzzle(grid, kind))
+		counts[result.status] += 1
+		assignments += result.assignments
+		backtracks += result.backtracks
+		solved += 1
+		if args.every > 0 and solved % args.every == 0:
+			report(solved, counts, assignments, backtracks, time.perf_counter() - start)
+	out.flush()
+	if stream is not sys.stdin.buffer:
+		stream.close()
+	report(solved, counts, assignments, backtracks, time.perf_counter() - start)
+	if args.batch == 0 and args.trace is not None:
+		trace.close()
+		sys.stderr.write('%r written to %s\n' % (counter, args.trace))
+	if args.batch == 0 and args.cache > 0:
+		sys.stderr.write('%r\n' % solver)
+
+def report(total, counts, assignments, backtracks, elapsed):
+	sys.stderr.write('%d puzzles (%s), assignments %d, backtracks %d, %.2fs (%.0f puzzles/s)\n' % (total,
+		', '.join('%s %d' % (status, count) for status, count in counts.items()), assignments, backtracks, elapsed,
+		total / max(elapsed, 1e-9)))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,146 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - asyncio API
+#################################
+
+# Solving from an event loop without blocking it
+# In the event loop: the search runs as Solver.solvesteps and gives the loop a turn every yieldevery iterations (and at
+# least every CHECKSECONDS of search), so other tasks keep running during a long solve
+# In an executor: the whole solve runs in a thread or process pool and the loop just awaits it
+# Cancelling the awaiting task stops the search at its next check and re-raises CancelledError. A solve in a process
+# pool only sees the cancel if the pool came from processexecutor (one in any other ProcessPoolExecutor runs on to its
+# own limits)
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from sudoku_solver import Solver, CancelToken, solve
+
+### Process pools ###
+# A process can not see a CancelToken of this one, and a multiprocessing Event can only reach pool workers by
+# inheritance (as in sudoku_portfolio.py), not as a task argument. The workers of a processexecutor pool share an array
+# of CANCELSLOTS flags through the pool initializer instead: every solve sent to the pool takes a free slot and its
+# worker's CancelToken reads that slot, so cancelling the solve sets the flag and the search stops at its next check
+CANCELSLOTS = 256
+
+# seconds between two looks at the caller's CancelToken while a solve runs in a process
+POLLSECONDS = 0.02
+
+# the flags of the current worker process
+workerflags = None
+
+def initworker(flags):
+	global workerflags
+	workerflags = flags
+
+# the event behind a CancelToken: flag slot of flags
+class SlotEvent:
+	def __init__(self, flags, slot):
+		self.flags = flags
+		self.slot = slot
+
+	def set(self):
+		self.flags[self.slot] = 1
+
+	def is_set(self):
+		return self.flags[self.slot] != 0
+
+# ProcessPoolExecutor of processes workers (one per core by default) whose solves solveasync can cancel
+def processexecutor(processes=None):
+	flags = multiprocessing.Array('b', CANCELSLOTS, lock=False)
+	executor = ProcessPoolExecutor(processes, initializer=initworker, initargs=(flags,))
+	executor.cancelflags = flags
+	executor.freeslots = list(range(CANCELSLOTS))
+	return executor
+
+# solve run in a processexecutor worker, cancelled through flag slot
+def solveslot(puzzle, variant, maxiter, boxes, timeout, slot):
+	return solve(puzzle, variant, maxiter, boxes, timeout, CancelToken(SlotEvent(workerflags, slot)))
+
+# solveasync in a process pool: without a free flag slot (a pool processexecutor did not make, or every slot taken)
+# only the puzzle and options are sent and the solve runs on to its own limits
+async def solveprocess(loop, executor, puzzle, variant, maxiter, boxes, timeout, cancel):
+	slots = getattr(executor, 'freeslots', None)
+	if not slots:
+		return await loop.run_in_executor(executor, solve, puzzle, variant, maxiter, boxes, timeout)
+	slot = slots.pop()
+	flags = executor.cancelflags
+	future = loop.run_in_executor(executor, solveslot, puzzle, variant, maxiter, boxes, timeout, slot)
+	try:
+		while True:
+			# asyncio.wait leaves the future running if this task is cancelled
+			done, pending = await asyncio.wait([future], timeout=POLLSECONDS)
+			if done:
+				return future.result()
+			if cancel.cancelled():
+				flags[slot] = 1
+	except asyncio.CancelledError:
+		# stop the worker's search before giving the slot back
+		flags[slot] = 1
+		await asyncio.wait([future])
+		raise
+	finally:
+		flags[slot] = 0
+		slots.append(slot)
+
+### solveasync ###
+# SolveResult of puzzle, solved by solver (a Solver, a new one of variant/maxiter/boxes by default)
+# timeout, nodes and cancel limit the solve as in Solver.solve
+# executor: None to search in the loop, yielding every yieldevery iterations, otherwise the concurrent.futures executor
+# to run the solve in (in a process pool the solve gets a new Solver there and only the puzzle and options are sent,
+# see processexecutor)
+async def solveasync(puzzle, variant='heuristics', maxiter=10000, boxes=True, timeout=None, nodes=None, cancel=None,
+		yieldevery=256, executor=None, solver=None):
+	if cancel is None:
+		cancel = CancelToken()
+	loop = asyncio.get_running_loop()
+	if executor is not None and isinstance(executor, ProcessPoolExecutor):
+		if nodes is not None:
+			maxiter = nodes
+		return await solveprocess(loop, executor, puzzle, variant, maxiter, boxes, timeout, cancel)
+	if solver is None:
+		solver = Solver(variant, maxiter, boxes)
+	if executor is not None:
+		future = loop.run_in_executor(executor, solver.solve, puzzle, timeout, nodes, cancel)
+		try:
+			return await asyncio.shield(future)
+		except asyncio.CancelledError:
+			# stop the search thread before giving the solver back
+			cancel.cancel()
+			await asyncio.wait([future])
+			raise
+	steps = solver.solvesteps(puzzle, timeout, nodes, cancel, yieldevery)
+	while True:
+		try:
+			next(steps)
+		except StopIteration as stop:
+			return stop.value
+		try:
+			await asyncio.sleep(0)
+		except asyncio.CancelledError:
+			# one more step sees the token and unwinds the search (putting the dlx links back)
+			cancel.cancel()
+			for step in steps:
+				pass
+			raise
+
+### solvemany ###
+# SolveResults of every puzzle of puzzles in order, with at most limit solves running at once
+# Solvers are reused between the solves (one per running solve), the other options are those of solveasync
+async def solvemany(puzzles, variant='heuristics', maxiter=10000, boxes=True, limit=8, timeout=None, nodes=None,
+		yieldevery=256, executor=None):
+	semaphore = asyncio.Semaphore(limit)
+	idle = []
+
+	async def one(puzzle):
+		async with semaphore:
+			if len(idle) > 0:
+				solver = idle.pop()
+			else:
+				solver = Solver(variant, maxiter, boxes)
+			try:
+				return await solveasync(puzzle, variant, maxiter, boxes, timeout, nodes, None, yieldevery, executor, solver)
+			finally:
+				idle.append(solver)
+
+	return await asyncio.gather(*[one(puzzle) for puzzle in puzzles])
@@ -0,0 +1,189 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - NumPy Batch Solver
+#################################
+
+# Solves many puzzles of one size at once: naked and hidden singles are propagated for the whole batch with array
+# operations, and only the puzzles propagation leaves undetermined are searched one by one (Solver variant propagate)
+# usage: python sudoku_batch.py [--root problems] [--chunksize 4096]
+
+import argparse
+import time
+import numpy as np
+from sudoku_bitset import geometry
+from sudoku_solver import Solver, SolveResult, SOLVED, UNSATISFIABLE, readpuzzle
+from sudoku_runner import corpusjobs
+
+# propagatebatch statuses of a puzzle
+BATCHSOLVED = 0
+BATCHCONTRADICTION = -1
+BATCHOPEN = 1
+
+### Unit tables ###
+# The units of a grid grouped by kind (rows, columns and boxes, just rows and columns with boxes=False)
+# Every kind splits the N*N cells into N units of N cells: kindcells[k] is an (N, N) array of the cell indices of the
+# units of kind k and kindunit[k] the (N*N,) array of the unit of kind k holding each cell
+# Built once per (boxsize, boxes)
+unittables = {}
+
+def units(boxsize, boxes=True):
+	key = (boxsize, boxes)
+	if key not in unittables:
+		geo = geometry(boxsize, boxes)
+		kinds = [geo.rowcells, geo.colcells]
+		if boxes:
+			kinds.append(geo.boxcells)
+		kindcells = []
+		kindunit = []
+		for kind in kinds:
+			cells = np.array(kind, dtype=np.intp)
+			unit = np.empty(geo.size*geo.size, dtype=np.intp)
+			unit[cells] = np.arange(geo.size)[:, None]
+			kindcells.append(cells)
+			kindunit.append(unit)
+		unittables[key] = (kindcells, kindunit)
+	return unittables[key]
+
+### puzzlearray ###
+# (B, N*N) array of the puzzles (0 for unassigned) from a list of grids (N rows of N values), a (B, N, N) array or
+# a (B, N*N) array. All puzzles must have the same size
+def puzzlearray(puzzles):
+	if isinstance(puzzles, np.ndarray):
+		values = puzzles
+	else:
+		values = np.array([np.asarray(puzzle).ravel() for puzzle in puzzles])
+	if values.ndim == 3:
+		values = values.reshape(values.shape[0], -1)
+	if values.ndim != 2:
+		raise ValueError('expected a batch of puzzles, got an array of shape %r' % (values.shape,))
+	size = int(round(values.shape[1] ** 0.5))
+	boxsize = int(round(size ** 0.5))
+	if boxsize*boxsize != size or size*size != values.shape[1]:
+		raise ValueError('puzzles have %d cells, expected N*N with N a square number (4, 9, 16, ...)' % values.shape[1])
+	if values.size and (values.min() < 0 or values.max() > size):
+		raise ValueError('puzzle values out of range 0..%d' % size)
+	return values.astype(np.uint8 if size < 256 else np.int32)
+
+### Candidate masks ###
+# The candidates of a cell are a bitmask as in sudoku_bitset.py (bit k-1 for digit k), so the (B, N*N, N) candidate
+# flags of a batch are held as one (B, N*N) array of unsigned integers wide enough for N bits
+
+def maskdtype(size):
+	if size <= 16:
+		return np.uint16
+	if size <= 32:
+		return np.uint32
+	return np.uint64
+
+# digit of every single bit mask in masks (0 stays 0)
+def maskdigit(masks):
+	return np.frexp(masks.astype(np.float64))[1]
+
+### propagatebatch ###
+# Assigns naked and hidden singles to every puzzle of values (a (B, N*N) array, 0 for unassigned) until none is left
+# Each pass works out the candidates of every cell of the still open puzzles from the digits placed on its row, column
+# and box, then assigns every naked single (cell with one candidate) and every hidden single (digit that fits in one
+# cell of a unit) at once. Puzzles that are solved or fail drop out of the next pass
+# A puzzle fails when a cell has no candidate, a digit fits nowhere in a unit, a unit holds a digit twice (givens
+# clashing, or two singles of one pass placing the same digit) or a cell is the hidden single of two digits
+# Returns (values, status): values is a filled in copy and status[b] is BATCHSOLVED, BATCHCONTRADICTION or BATCHOPEN
+def propagatebatch(values, boxes=True):
+	values = np.array(values)
+	batch, cells = values.shape
+	size = int(round(cells ** 0.5))
+	kindcells, kindunit = units(int(round(size ** 0.5)), boxes)
+	dtype = maskdtype(size)
+	one = dtype(1)
+	fullmask = dtype((1 << size) - 1)
+	status = np.full(batch, BATCHOPEN, dtype=np.int8)
+	active = np.arange(batch)
+	while len(active) > 0:
+		current = values[active]
+		empty = current == 0
+		bits = np.where(empty, 0, one << (current.astype(dtype) - one)).astype(dtype)
+		# digits used by the units of each cell: the bits of a unit only add up to their OR if no digit is there twice
+		used = np.zeros(bits.shape, dtype=dtype)
+		failed = np.zeros(len(active), dtype=bool)
+		placed = []
+		for cellsof, unitof in zip(kindcells, kindunit):
+			unitbits = bits[:, cellsof]
+			unitused = np.bitwise_or.reduce(unitbits, axis=2)
+			failed |= (unitbits.sum(axis=2, dtype=np.uint64) != unitused).any(axis=1)
+			used |= unitused[:, unitof]
+			placed.append(unitused)
+		candidates = np.where(empty, fullmask & ~used, 0).astype(dtype)
+		failed |= (empty & (candidates == 0)).any(axis=1)
+		# naked singles
+		single = np.where(candidates & (candidates - one) == 0, candidates, 0).astype(dtype)
+		# hidden singles: the candidates of a cell that no other cell of the unit has, with the OR of the cells before
+		# and after each cell from running ORs along the unit
+		for (cellsof, unitof), unitused in zip(zip(kindcells, kindunit), placed):
+			fits = candidates[:, cellsof]
+			before = np.zeros(fits.shape, dtype=dtype)
+			after = np.zeros(fits.shape, dtype=dtype)
+			before[:, :, 1:] = np.bitwise_or.accumulate(fits[:, :, :-1], axis=2)
+			after[:, :, :-1] = np.bitwise_or.accumulate(fits[:, :, :0:-1], axis=2)[:, :, ::-1]
+			failed |= ((before[:, :, -1] | fits[:, :, -1] | unitused) != fullmask).any(axis=1)
+			single[:, cellsof] |= fits & ~(before | after)
+		failed |= (single & (single - one) != 0).any(axis=1)
+		assign = single != 0
+		current = np.where(assign, maskdigit(single), current).astype(values.dtype)
+		values[active] = current
+		done = ~failed & ~(current == 0).any(axis=1)
+		status[active[failed]] = BATCHCONTRADICTION
+		status[active[done]] = BATCHSOLVED
+		# only the puzzles that changed and are still open go round again
+		more = ~failed & ~done & assign.any(axis=1)
+		active = active[more]
+	# the last pass of a solved puzzle has not checked the singles it placed
+	solved = np.flatnonzero(status == BATCHSOLVED)
+	if len(solved) > 0:
+		bits = one << (values[solved].astype(dtype) - one)
+		for cellsof in kindcells:
+			bad = (np.bitwise_or.reduce(bits[:, cellsof], axis=2) != fullmask).any(axis=1)
+			status[solved[bad]] = BATCHCONTRADICTION
+	return values, status
+
+### solvebatch ###
+# Solve a batch of puzzles of one size (anything puzzlearray takes) and return one SolveResult per puzzle, in order
+# The batch is propagated chunksize puzzles at a time (bounding the memory of the candidate arrays) and each puzzle
+# left open is finished by a propagate Solver from its propagated grid, with maxiter as in Solver and timeout/nodes
+# as in Solver.solve (each applies to the search of one puzzle)
+# assignments/backtracks count the decisions of that search only, so they are 0 for puzzles propagation solves
+def solvebatch(puzzles, maxiter=10000, boxes=True, chunksize=4096, timeout=None, nodes=None):
+	values = puzzlearray(puzzles)
+	size = int(round(values.shape[1] ** 0.5))
+	solver = Solver('propagate', maxiter, boxes)
+	results = []
+	for start in range(0, len(values), chunksize):
+		filled, status = propagatebatch(values[start:start + chunksize], boxes)
+		for b in range(len(filled)):
+			grid = filled[b].reshape(size, size).tolist()
+			if status[b] == BATCHSOLVED:
+				results.append(SolveResult(grid, SOLVED, 0, 0))
+			elif status[b] == BATCHCONTRADICTION:
+				results.append(SolveResult(None, UNSATISFIABLE, 0, 0))
+			else:
+				results.append(solver.solve(grid, timeout, nodes))
+	return results
+
+def main():
+	parser = argparse.ArgumentParser(description='Solve the problems corpus as one NumPy batch')
+	parser.add_argument('--root', default='problems')
+	parser.add_argument('--chunksize', type=int, default=4096)
+	parser.add_argument('--maxiter', type=int, default=10000)
+	args = parser.parse_args()
+
+	puzzles = [readpuzzle(path) for index, path, variant in corpusjobs(['propagate'], args.root)]
+	start = time.perf_counter()
+	filled, status = propagatebatch(puzzlearray(puzzles))
+	propagated = time.perf_counter() - start
+	results = solvebatch(puzzles, args.maxiter, chunksize=args.chunksize)
+	elapsed = time.perf_counter() - start - propagated
+	print('%d puzzles: %d solved by propagation, %d contradictions, %d searched (propagation %.3fs)' % (len(puzzles),
+		(status == BATCHSOLVED).sum(), (status == BATCHCONTRADICTION).sum(), (status == BATCHOPEN).sum(), propagated))
+	print('solved %d/%d in %.3fs, assignments %d, backtracks %d' % (sum(1 for result in results if result.status == SOLVED),
+		len(results), elapsed, sum(result.assignments for result in results), sum(result.backtracks for result in results)))
+
+if __name__ == '__main__':
+	main()
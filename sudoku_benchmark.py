@@ -0,0 +1,178 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Benchmark Suite
+#################################
+
+# Runs solver variants over the corpus, timing every solve, and reports latency percentiles per clue count bucket
+# usage: python sudoku_benchmark.py [--variants basic fwdcheck ...] [--output benchmark.json | benchmark.csv]
+#        [--bucket 10] [--processes 1] [--packed problems.sdpk] [--noboxes]
+# The output file (JSON or CSV, by extension) is what sudoku_plot.py and linear_regression_plot.py plot
+
+import argparse
+import csv
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from sudoku_solver import VARIANTS, BUDGETEXHAUSTED, SOLVED
+from sudoku_runner import corpusjobs, packedjobs, runcorpus, ordered
+
+# per puzzle fields written to the output, in CSV column order
+FIELDS = ('index', 'path', 'variant', 'clues', 'status', 'assignments', 'backtracks', 'wall', 'cpu')
+
+### Statistics ###
+# nearest rank percentile of a sorted list
+def percentile(values, p):
+	if len(values) == 0:
+		return 0.0
+	return values[max(0, int(math.ceil(p/100.0*len(values))) - 1)]
+
+# summary of the records of one variant in one clue bucket
+def bucketstats(records):
+	walls = sorted(record['wall'] for record in records)
+	return {'puzzles': len(records),
+		'solved': sum(1 for record in records if record['status'] == SOLVED),
+		'timeouts': sum(1 for record in records if record['status'] == BUDGETEXHAUSTED),
+		'median': percentile(walls, 50), 'p95': percentile(walls, 95), 'p99': percentile(walls, 99),
+		'cpu': sum(record['cpu'] for record in records),
+		'assignments': sum(record['assignments'] for record in records),
+		'backtracks': sum(record['backtracks'] for record in records)}
+
+# list of bucket summaries, one per (variant, clue bucket) in variant then clue order
+# bucket k of width w holds the puzzles with k*w+1 .. k*w+w clues
+def buckets(records, variants, width):
+	groups = {}
+	for record in records:
+		groups.setdefault((record['variant'], (record['clues'] - 1) // width), []).append(record)
+	summaries = []
+	for variant in variants:
+		for key in sorted(key for key in groups if key[0] == variant):
+			summary = {'variant': variant, 'clues': '%d-%d' % (key[1]*width + 1, key[1]*width + width)}
+			summary.update(bucketstats(groups[key]))
+			summaries.append(summary)
+	return summaries
+
+### Output ###
+# a packed job path is (corpus path, record), written as corpus path:record
+def pathtext(path):
+	if isinstance(path, tuple):
+		return '%s:%d' % path
+	return path
+
+def writejson(path, meta, records, summaries):
+	with open(path, 'w') as f:
+		json.dump({'meta': meta, 'buckets': summaries,
+			'records': [dict((field, record[field]) for field in FIELDS) for record in records]}, f, indent=1)
+
+def writecsv(path, records):
+	with open(path, 'w', newline='') as f:
+		writer = csv.writer(f)
+		writer.writerow(FIELDS)
+		for record in records:
+			writer.writerow([record[field] for field in FIELDS])
+
+# per puzzle records of a benchmark output file (JSON or CSV), in job order
+def readbenchmark(path):
+	if path.endswith('.csv'):
+		records = []
+		with open(path, newline='') as f:
+			for row in csv.DictReader(f):
+				for field in ('index', 'clues', 'assignments', 'backtracks'):
+					row[field] = int(row[field])
+				for field in ('wall', 'cpu'):
+					row[field] = float(row[field])
+				records.append(row)
+	else:
+		with open(path) as f:
+			records = json.load(f)['records']
+	records.sort(key=lambda record: record['index'])
+	return records
+
+# counter of every puzzle of variant in job order (the per variant lists the plots use), ValueError if it was not run
+def variantcounts(records, variant, field='assignments'):
+	counts = [record[field] for record in records if record['variant'] == variant]
+	if len(counts) == 0:
+		raise ValueError('the benchmark output has no %s results, run sudoku_benchmark.py --variants %s' % (variant, variant))
+	return counts
+
+### Cold start ###
+# Worker processes import the solvers on every spawn, so the import time of the modules they load is part of the cost
+# of each job. Importing any of these must not load numpy or matplotlib, those are only imported by the code that
+# uses them (solvebatch, PackedCorpus, the plots)
+COLDSTARTMODULES = ('sudoku_solver', 'sudoku', 'sudoku_runner', 'sudoku_server', 'sudoku_portfolio', 'sudoku_generate',
+	'sudoku_benchmark', 'sudoku_plot')
+
+COLDSTARTSCRIPT = '''import sys, time
+start = time.perf_counter()
+import %s
+print(time.perf_counter() - start, 'numpy' in sys.modules, 'matplotlib' in sys.modules)'''
+
+# median seconds to start a new interpreter that imports module and of the import alone over runs fresh processes,
+# and whether the import loaded numpy or matplotlib, as a dict
+def coldstart(module, runs=10):
+	directory = os.path.dirname(os.path.abspath(__file__))
+	processtimes = []
+	importtimes = []
+	for run in range(runs):
+		start = time.perf_counter()
+		output = subprocess.run([sys.executable, '-c', COLDSTARTSCRIPT % module], cwd=directory, capture_output=True,
+			text=True, check=True).stdout.split()
+		processtimes.append(time.perf_counter() - start)
+		importtimes.append(float(output[0]))
+	return {'module': module, 'process': percentile(sorted(processtimes), 50), 'import': percentile(sorted(importtimes), 50),
+		'numpy': output[1] == 'True', 'matplotlib': output[2] == 'True'}
+
+def main():
+	parser = argparse.ArgumentParser(description='Time solver variants over the corpus')
+	parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=VARIANTS)
+	parser.add_argument('--output', default='benchmark.json', help='.json (per puzzle records and bucket summaries) or .csv')
+	parser.add_argument('--bucket', type=int, default=10, help='clue counts per bucket')
+	parser.add_argument('--processes', type=int, default=1, help='worker processes (more than 1 makes the timings noisier)')
+	parser.add_argument('--maxiter', type=int, default=10000)
+	parser.add_argument('--root', default='problems')
+	parser.add_argument('--packed', help='packed corpus (sudoku_packed.py) to run instead of the problems tree')
+	parser.add_argument('--noboxes', action='store_true', help='row/column rules only, as in sudoku.py and results.txt')
+	parser.add_argument('--coldstart', type=int, default=0, metavar='RUNS',
+		help='also time a fresh interpreter importing each module over RUNS runs')
+	args = parser.parse_args()
+
+	coldstarts = []
+	if args.coldstart > 0:
+		print('%-17s %10s %10s  %s' % ('module', 'process', 'import', 'loads'))
+		for module in COLDSTARTMODULES:
+			coldstarts.append(coldstart(module, args.coldstart))
+			loads = [name for name in ('numpy', 'matplotlib') if coldstarts[-1][name]]
+			print('%-17s %8.1fms %8.1fms  %s' % (module, coldstarts[-1]['process']*1000, coldstarts[-1]['import']*1000,
+				', '.join(loads) or '-'))
+
+	if args.packed is not None:
+		jobs = packedjobs(args.variants, args.packed)
+	else:
+		jobs = corpusjobs(args.variants, args.root)
+	start = time.perf_counter()
+	records = list(ordered(runcorpus(jobs, args.processes, args.maxiter, boxes=not args.noboxes)))
+	elapsed = time.perf_counter() - start
+	for record in records:
+		record['path'] = pathtext(record['path'])
+	summaries = buckets(records, args.variants, args.bucket)
+
+	print('%-11s %-7s %7s %7s %9s %10s %10s %10s %12s' % ('variant', 'clues', 'solved', 'timeout', 'cpu', 'median',
+		'p95', 'p99', 'assignments'))
+	for summary in summaries:
+		print('%-11s %-7s %3d/%-3d %7d %8.3fs %8.3fms %8.3fms %8.3fms %12d' % (summary['variant'], summary['clues'],
+			summary['solved'], summary['puzzles'], summary['timeouts'], summary['cpu'], summary['median']*1000,
+			summary['p95']*1000, summary['p99']*1000, summary['assignments']))
+	meta = {'variants': args.variants, 'maxiter': args.maxiter, 'boxes': not args.noboxes, 'processes': args.processes,
+		'source': args.packed or args.root, 'bucket': args.bucket, 'elapsed': elapsed}
+	if len(coldstarts) > 0:
+		meta['coldstart'] = coldstarts
+	if args.output.endswith('.csv'):
+		writecsv(args.output, records)
+	else:
+		writejson(args.output, meta, records, summaries)
+	print('%d solves in %.2fs, written to %s' % (len(records), elapsed, args.output))
+
+if __name__ == '__main__':
+	main()
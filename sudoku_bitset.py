@@ -0,0 +1,642 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Bitset Domain Engine
+#################################
+
+from array import array
+
+# Default Sudoku Grid 9x9 (box size 3)
+GRIDSIZE = 9
+BOXSIZE = 3
+
+### Grid Geometry ###
+# Cell indices of every row, column and box of an N x N grid with N = boxsize*boxsize (cell i is row i//N, column i%N)
+# cellbox[i] is the box of cell i and boxpeers[i] the cells in the box of i that are not on the row or column of i
+# units are the cell groups that must hold every digit exactly once (rows, columns and boxes)
+# peers[i] are the cells sharing a unit with cell i
+# boxes=False gives the original row/column only rules of sudoku.py: every cell is its own box so there are no box peers
+# Built once per (boxsize, boxes) and shared by every Board and BitsetDomains of that size, all tables are tuples
+geometries = {}
+
+class Geometry:
+	def __init__(self, boxsize, boxes):
+		size = boxsize*boxsize
+		self.boxsize = boxsize
+		self.size = size
+		self.boxes = boxes
+		self.fullmask = (1 << size) - 1
+		self.cellrow = tuple(i // size for i in range(size*size))
+		self.cellcol = tuple(i % size for i in range(size*size))
+		self.rowcells = tuple(tuple(r*size + c for c in range(size)) for r in range(size))
+		self.colcells = tuple(tuple(r*size + c for r in range(size)) for c in range(size))
+		if boxes:
+			self.cellbox = tuple((r//boxsize)*boxsize + c//boxsize for r in range(size) for c in range(size))
+			self.boxcells = tuple(tuple(i for i in range(size*size) if self.cellbox[i] == b) for b in range(size))
+		else:
+			self.cellbox = tuple(range(size*size))
+			self.boxcells = tuple((i,) for i in range(size*size))
+		self.boxpeers = tuple(tuple(j for j in self.boxcells[self.cellbox[i]] if j // size != i // size and j % size != i % size)
+			for i in range(size*size))
+		self.units = self.rowcells + self.colcells
+		if boxes:
+			self.units = self.units + self.boxcells
+		# every other cell on the row, column or box of cell i
+		self.peers = tuple(tuple(j for j in self.rowcells[i // size] + self.colcells[i % size] + self.boxpeers[i] if j != i)
+			for i in range(size*size))
+
+def geometry(boxsize=BOXSIZE, boxes=True):
+	key = (boxsize, boxes)
+	if key not in geometries:
+		geometries[key] = Geometry(boxsize, boxes)
+	return geometries[key]
+
+# box size of a square puzzle (list of rows), raises ValueError unless it has N rows of N values with N a perfect square
+def puzzleboxsize(puzzle):
+	size = len(puzzle)
+	boxsize = int(round(size ** 0.5))
+	if size == 0 or boxsize*boxsize != size:
+		raise ValueError('grid has %d rows, expected a square number (4, 9, 16, 25, ...)' % size)
+	for row in puzzle:
+		if len(row) != size:
+			raise ValueError('grid row has %d values, expected %d' % (len(row), size))
+	return boxsize
+
+### Board ###
+# An N x N grid as one flat buffer of N*N values, cell i = r*N + c (0 for unassigned): a bytearray up to N = 255, an
+# array of 16 bit values beyond. geo is the shared Geometry of the board, so loops over a row, column, box or the
+# peers of a cell go through its index tuples. copy() is a single buffer copy
+class Board:
+	def __init__(self, geo, cells=None):
+		self.geo = geo
+		self.size = geo.size
+		if cells is None:
+			if geo.size < 256:
+				cells = bytearray(geo.size*geo.size)
+			else:
+				cells = array('H', bytes(2*geo.size*geo.size))
+		self.cells = cells
+
+	def copy(self):
+		return Board(self.geo, self.cells[:])
+
+	# the grid as N rows of N values (the puzzle format of readpuzzle and SolveResult.solution)
+	def rows(self):
+		size = self.size
+		cells = self.cells
+		return [list(cells[r*size:r*size + size]) for r in range(size)]
+
+	def __getitem__(self, i):
+		return self.cells[i]
+
+	def __setitem__(self, i, value):
+		self.cells[i] = value
+
+	def __len__(self):
+		return len(self.cells)
+
+	def __eq__(self, other):
+		return isinstance(other, Board) and self.cells == other.cells
+
+	def __repr__(self):
+		return 'Board(%dx%d, %d of %d cells assigned)' % (self.size, self.size, len(self.cells) - self.cells.count(0),
+			len(self.cells))
+
+# Board of puzzle (N rows of N values, or a Board which is copied), raises ValueError if it is not a valid grid
+def makeboard(puzzle, boxes=True):
+	if isinstance(puzzle, Board):
+		return Board(geometry(puzzle.geo.boxsize, boxes), puzzle.cells[:])
+	board = Board(geometry(puzzleboxsize(puzzle), boxes))
+	size = board.size
+	cells = board.cells
+	for r in range(size):
+		row = puzzle[r]
+		for c in range(size):
+			value = row[c]
+			if value < 0 or value > size:
+				raise ValueError('cell (%d,%d) holds %d, expected 0..%d' % (r, c, value, size))
+			cells[r*size + c] = value
+	return board
+
+# puzzle as N rows of N values (a Board converted, a list of rows as it is)
+def gridrows(puzzle):
+	if isinstance(puzzle, Board):
+		return puzzle.rows()
+	return puzzle
+
+### BitsetDomains ###
+# Replaces the 9x9x9 invalidmatrix with integer bitmasks (bit k-1 stands for digit k)
+# rowused[r], colused[c] and boxused[b] hold the digits already placed in that row/column/box
+# rowempty[r] has bit c set if cell (r,c) is unassigned, colempty[c] has bit r set if cell (r,c) is unassigned
+# hard[i] and fwd[i] (i = r*N + c) hold the digits of cell i that invalidmatrix would mark 1 and 2 respectively
+# so every test that used to walk a row, column or invalid vector is now a couple of bitwise operations
+# marks is the undo trail of the invalid marks: a mark is only set on a digit not marked yet, and every one set after
+# the initial conflicts is appended as the pair (cell index, digits marked). undomarks(checkpoint) takes back exactly
+# the marks set since len(marks) was checkpoint, newest first, so an undo costs the number of marks it clears and never
+# touches the marks set before the checkpoint
+# A digit is valid for a cell if it is not used on its row, column or box (just row and column with boxes=False)
+#
+# Most constrained variable index (only built once findnextzeroheuristics is first called):
+# level[i] is the number of invalid marks of unassigned cell i (-1 if assigned) and bucket[k] is a bitmask over cell indices
+# of the unassigned cells with exactly k invalid marks. Every method that changes marks or assignments keeps both in step,
+# so picking the next variable only has to look at the cells in the highest non-empty bucket
+#
+# Least constraining value counts (only built once ordervalues is first called):
+# rowsupport[r*N + k] is the number of cells of row r whose digit k+1 is not marked invalid, colsupport and boxsupport
+# (None with boxes=False) the same per column and box. Every mark set or undone updates them, so scoring a digit for a
+# cell is two or three lookups instead of a walk over its row and column
+# puzzle is N rows of N values or a Board, either way the domains work on a Board of their own (board, with values its
+# cell buffer) and leave puzzle untouched
+class BitsetDomains:
+	def __init__(self, puzzle, boxes=True):
+		board = makeboard(puzzle, boxes)
+		geo = board.geo
+		size = geo.size
+		self.geo = geo
+		self.size = size
+		self.fullmask = geo.fullmask
+		self.cellbox = geo.cellbox
+		self.board = board
+		self.values = board.cells
+		self.rowused = [0] * size
+		self.colused = [0] * size
+		self.boxused = [0] * len(geo.boxcells)
+		self.rowempty = [0] * size
+		self.colempty = [0] * size
+		values = self.values
+		# set if two givens share a digit on a row, column or box, the puzzle then has no solution
+		self.clash = False
+		for i in range(size*size):
+			r = geo.cellrow[i]
+			c = geo.cellcol[i]
+			if values[i] != 0:
+				bit = 1 << (values[i]-1)
+				if (self.rowused[r] | self.colused[c] | self.boxused[self.cellbox[i]]) & bit:
+					self.clash = True
+				self.rowused[r] |= bit
+				self.colused[c] |= bit
+				self.boxused[self.cellbox[i]] |= bit
+			else:
+				self.rowempty[r] |= 1 << c
+				self.colempty[c] |= 1 << r
+		# initial conflicts with the given values (what the firsttimeflag block in sudoku.py sets up)
+		self.hard = [0] * (size*size)
+		self.fwd = [0] * (size*size)
+		for i in range(size*size):
+			self.hard[i] = self.conflicts(geo.cellrow[i], geo.cellcol[i])
+		self.marks = []
+		self.level = None
+		self.bucket = None
+		self.rowsupport = None
+		self.colsupport = None
+		self.boxsupport = None
+
+	# build the most constrained variable index from the current marks
+	def buildindex(self):
+		self.level = [-1] * (self.size*self.size)
+		self.bucket = [0] * (self.size+1)
+		for i in range(self.size*self.size):
+			if self.values[i] == 0:
+				self.level[i] = (self.hard[i] | self.fwd[i]).bit_count()
+				self.bucket[self.level[i]] |= 1 << i
+
+	# build the least constraining value counts from the current marks
+	def buildsupport(self):
+		size = self.size
+		self.rowsupport = [0] * (size*size)
+		self.colsupport = [0] * (size*size)
+		if self.geo.boxes:
+			self.boxsupport = [0] * (size*size)
+		for i in range(size*size):
+			self.resupport(i, self.fullmask & ~(self.hard[i] | self.fwd[i]))
+
+	# count digits bits of cell i as no longer marked invalid (resupport) or as newly marked (unsupport)
+	def resupport(self, i, bits):
+		size = self.size
+		r, c = divmod(i, size)
+		boxsupport = self.boxsupport
+		while bits != 0:
+			low = bits & -bits
+			bits ^= low
+			k = low.bit_length() - 1
+			self.rowsupport[r*size + k] += 1
+			self.colsupport[c*size + k] += 1
+			if boxsupport is not None:
+				boxsupport[self.cellbox[i]*size + k] += 1
+
+	def unsupport(self, i, bits):
+		size = self.size
+		r, c = divmod(i, size)
+		boxsupport = self.boxsupport
+		while bits != 0:
+			low = bits & -bits
+			bits ^= low
+			k = low.bit_length() - 1
+			self.rowsupport[r*size + k] -= 1
+			self.colsupport[c*size + k] -= 1
+			if boxsupport is not None:
+				boxsupport[self.cellbox[i]*size + k] -= 1
+
+	# move unassigned cell i to the bucket matching its current number of invalid marks
+	def reindex(self, i):
+		old = self.level[i]
+		if old >= 0:
+			new = (self.hard[i] | self.fwd[i]).bit_count()
+			if new != old:
+				self.bucket[old] ^= 1 << i
+				self.bucket[new] |= 1 << i
+				self.level[i] = new
+
+	# digits ruled out for cell (r,c) by values already on its row, column and box
+	def conflicts(self, r, c):
+		return self.rowused[r] | self.colused[c] | self.boxused[self.cellbox[r*self.size + c]]
+
+	# candidate mask of cell (r,c) - digits neither marked invalid nor clashing with its row/column/box
+	def candidates(self, r, c):
+		i = r*self.size + c
+		return self.fullmask & ~(self.hard[i] | self.fwd[i] | self.conflicts(r, c))
+
+	# number of candidates left for cell (r,c)
+	def domainsize(self, r, c):
+		return self.candidates(r, c).bit_count()
+
+	# number of non-zero entries in the cell's invalid vector (used by most constrained variable heuristic)
+	def restrictions(self, r, c):
+		i = r*self.size + c
+		return (self.hard[i] | self.fwd[i]).bit_count()
+
+	# number of unassigned cells sharing a row or column index with (r,c) (used by most constraining variable heuristic)
+	# r = c = -1 reads the last row/column, same as indexing puzzle[-1] in the original tie-break
+	def degree(self, r, c):
+		return (self.rowempty[r] | self.colempty[c]).bit_count()
+
+	# 1 if every digit of cell i is marked invalid (forward checking wipeout)
+	def wipedout(self, i):
+		return (self.hard[i] | self.fwd[i]) == self.fullmask
+
+	# write value into cell (r,c) (0 to unassign) keeping the used/empty masks in sync
+	def setcell(self, r, c, value):
+		i = r*self.size + c
+		old = self.values[i]
+		b = self.cellbox[i]
+		if old != 0:
+			mask = ~(1 << (old-1))
+			self.rowused[r] &= mask
+			self.colused[c] &= mask
+			self.boxused[b] &= mask
+		self.values[i] = value
+		if value != 0:
+			bit = 1 << (value-1)
+			self.rowused[r] |= bit
+			self.colused[c] |= bit
+			self.boxused[b] |= bit
+			self.rowempty[r] &= ~(1 << c)
+			self.colempty[c] &= ~(1 << r)
+		else:
+			self.rowempty[r] |= 1 << c
+			self.colempty[c] |= 1 << r
+		if self.level is not None:
+			if value != 0 and self.level[i] >= 0:
+				self.bucket[self.level[i]] ^= 1 << i
+				self.level[i] = -1
+			elif value == 0 and self.level[i] < 0:
+				self.level[i] = (self.hard[i] | self.fwd[i]).bit_count()
+				self.bucket[self.level[i]] |= 1 << i
+
+	### Mark Trail ###
+	# mark digit invalid for cell (r,c) (a value the search tried and took back), the digit must not be marked already
+	def markinvalid(self, r, c, digit):
+		i = r*self.size + c
+		bit = 1 << (digit-1)
+		self.hard[i] |= bit
+		self.marks.append(i)
+		self.marks.append(bit)
+		if self.level is not None:
+			self.reindex(i)
+		if self.rowsupport is not None:
+			self.unsupport(i, bit)
+
+	# clear the marks set since len(marks) was checkpoint
+	def undomarks(self, checkpoint):
+		size = self.size
+		marks = self.marks
+		hard = self.hard
+		fwd = self.fwd
+		level = self.level
+		rowsupport = self.rowsupport
+		colsupport = self.colsupport
+		boxsupport = self.boxsupport
+		while len(marks) > checkpoint:
+			bits = marks.pop()
+			i = marks.pop()
+			hard[i] &= ~bits
+			fwd[i] &= ~bits
+			if level is not None and level[i] >= 0:
+				bucket = self.bucket
+				bucket[level[i]] ^= 1 << i
+				level[i] -= bits.bit_count()
+				bucket[level[i]] |= 1 << i
+			if rowsupport is not None:
+				# forward checking marks (most of the trail) are single digits
+				if bits & (bits - 1) == 0:
+					k = bits.bit_length() - 1
+					rowsupport[(i // size)*size + k] += 1
+					colsupport[(i % size)*size + k] += 1
+					if boxsupport is not None:
+						boxsupport[self.cellbox[i]*size + k] += 1
+				else:
+					self.resupport(i, bits)
+
+	### findnextzero - Basic Version ###
+	# first unassigned cell in row-major order starting at row start, [-1,-1] if the puzzle is full
+	def findnextzero(self, start):
+		for r in range(start, self.size):
+			empties = self.rowempty[r]
+			if empties != 0:
+				return [r, (empties & -empties).bit_length() - 1]
+		return [-1,-1]
+
+	### findnextzero - Most constrained variable + most constraining variable ###
+	# Same choice as findnextzeroheuristics in sudoku.py: the unassigned cell with the most invalid marks, ties going to
+	# the cell with the most unassigned cells on its row/column, and among those the last one in row-major order.
+	# Only the highest non-empty bucket is scanned and each tie-break is a popcount of the row/column empty masks
+	def findnextzeroheuristics(self):
+		if self.level is None:
+			self.buildindex()
+		result = [-1,-1]
+		mostrestrictions = self.size
+		while self.bucket[mostrestrictions] == 0:
+			if mostrestrictions == 0:
+				return result
+			mostrestrictions -= 1
+		cells = self.bucket[mostrestrictions]
+		# when no cell has any restriction sudoku.py compares the first candidate against result = [-1,-1] itself
+		if mostrestrictions == 0:
+			mostr = self.degree(-1, -1)
+		else:
+			mostr = -1
+		rowempty = self.rowempty
+		colempty = self.colempty
+		size = self.size
+		while cells != 0:
+			low = cells & -cells
+			cells ^= low
+			r, c = divmod(low.bit_length() - 1, size)
+			testr = (rowempty[r] | colempty[c]).bit_count()
+			if testr >= mostr:
+				result = [r,c]
+				mostr = testr
+		return result
+
+	### findnextvalid - Basic Version ###
+	# invalid is the local invalid mask of the cell, returns the lowest valid digit (0 if none) and the updated mask
+	def findnextvalid(self, r, c, invalid):
+		free = self.fullmask & ~(invalid | self.conflicts(r, c))
+		if free == 0:
+			return 0, self.fullmask
+		low = free & -free
+		# every digit below the one chosen was tested and found invalid
+		return low.bit_length(), invalid | (low - 1)
+
+	### findnextvalid - Forward Checking Version ###
+	# lowest valid digit for cell (r,c), digits tested and found invalid are marked hard (1) as in invalidmatrix
+	# (nothing is marked on a dead end, the parent's undo would take the marks straight back)
+	def findnextvalidfwdcheck(self, r, c):
+		i = r*self.size + c
+		marked = self.hard[i] | self.fwd[i]
+		free = self.fullmask & ~(marked | self.conflicts(r, c))
+		if free == 0:
+			return 0
+		low = free & -free
+		new = (low - 1) & ~marked
+		if new != 0:
+			self.hard[i] |= new
+			self.marks.append(i)
+			self.marks.append(new)
+			if self.level is not None:
+				self.reindex(i)
+			if self.rowsupport is not None:
+				self.unsupport(i, new)
+		return low.bit_length()
+
+	### Value Order - Forward Checking + Heuristics Version ###
+	# valid digits of cell (r,c), least constraining first: the digit left unmarked in the fewest cells of the row,
+	# column and box of (r,c) (lowest digit on ties). As in sudoku.py every invalid digit gets marked hard first
+	# Called once per search node, the node takes the digits in this order. Going back to the node undoes everything
+	# below it, so the digits left and their counts are the same as when the order was made
+	def ordervalues(self, r, c):
+		if self.rowsupport is None:
+			self.buildsupport()
+		size = self.size
+		i = r*size + c
+		marked = self.hard[i] | self.fwd[i]
+		free = self.fullmask & ~(marked | self.conflicts(r, c))
+		new = self.fullmask & ~(free | marked)
+		if new != 0:
+			self.hard[i] |= new
+			self.marks.append(i)
+			self.marks.append(new)
+			if self.level is not None:
+				self.reindex(i)
+			self.unsupport(i, new)
+		rowsupport = self.rowsupport
+		colsupport = self.colsupport
+		boxsupport = self.boxsupport
+		scored = []
+		while free != 0:
+			low = free & -free
+			free ^= low
+			k = low.bit_length() - 1
+			score = rowsupport[r*size + k] + colsupport[c*size + k]
+			if boxsupport is not None:
+				score += boxsupport[self.cellbox[i]*size + k]
+			scored.append(score*size + k)
+		scored.sort()
+		return [score % size + 1 for score in scored]
+
+	### Forward Checking ###
+	# remove digit from the domains of unassigned cells on the same row, then column, then box as (r,c)
+	# returns 1 if this leaves some cell with no valid digits, in which case the remaining units are skipped as in sudoku.py
+	# Every mark set goes on marks, undomarks to the length of marks before the call takes them back
+	def forwardcheck(self, r, c, digit):
+		size = self.size
+		fullmask = self.fullmask
+		bit = 1 << (digit-1)
+		hard = self.hard
+		fwd = self.fwd
+		marks = self.marks
+		level = self.level
+		bucket = self.bucket
+		rowsupport = self.rowsupport
+		colsupport = self.colsupport
+		boxsupport = self.boxsupport
+		cellbox = self.cellbox
+		k = digit-1
+		wipeout = 0
+		empties = self.rowempty[r]
+		while empties != 0:
+			low = empties & -empties
+			empties ^= low
+			i = r*size + low.bit_length() - 1
+			if (hard[i] | fwd[i]) & bit == 0:
+				fwd[i] |= bit
+				marks.append(i)
+				marks.append(bit)
+				if level is not None:
+					bucket[level[i]] ^= 1 << i
+					level[i] += 1
+					bucket[level[i]] |= 1 << i
+				if rowsupport is not None:
+					rowsupport[r*size + k] -= 1
+					colsupport[(low.bit_length() - 1)*size + k] -= 1
+					if boxsupport is not None:
+						boxsupport[cellbox[i]*size + k] -= 1
+			if (hard[i] | fwd[i]) == fullmask:
+				wipeout = 1
+		if wipeout == 0:
+			empties = self.colempty[c]
+			while empties != 0:
+				low = empties & -empties
+				empties ^= low
+				i = (low.bit_length() - 1)*size + c
+				if (hard[i] | fwd[i]) & bit == 0:
+					fwd[i] |= bit
+					marks.append(i)
+					marks.append(bit)
+					if level is not None:
+						bucket[level[i]] ^= 1 << i
+						level[i] += 1
+						bucket[level[i]] |= 1 << i
+					if rowsupport is not None:
+						rowsupport[(low.bit_length() - 1)*size + k] -= 1
+						colsupport[c*size + k] -= 1
+						if boxsupport is not None:
+							boxsupport[cellbox[i]*size + k] -= 1
+				if (hard[i] | fwd[i]) == fullmask:
+					wipeout = 1
+		if wipeout == 0:
+			values = self.values
+			for i in self.geo.boxpeers[r*size + c]:
+				if values[i] == 0:
+					if (hard[i] | fwd[i]) & bit == 0:
+						fwd[i] |= bit
+						marks.append(i)
+						marks.append(bit)
+						if level is not None:
+							bucket[level[i]] ^= 1 << i
+							level[i] += 1
+							bucket[level[i]] |= 1 << i
+						if rowsupport is not None:
+							rowsupport[(i // size)*size + k] -= 1
+							colsupport[(i % size)*size + k] -= 1
+							if boxsupport is not None:
+								boxsupport[cellbox[i]*size + k] -= 1
+					if (hard[i] | fwd[i]) == fullmask:
+						wipeout = 1
+		return wipeout
+
+	### Constraint Propagation ###
+	# Candidates here only come from the values on the row/column/box (the invalid marks of the three search
+	# variants above are not used), so undoing a propagation is just unassigning the cells it assigned
+	# Repeats until nothing changes:
+	# - naked singles: an unassigned cell with a single candidate gets that digit
+	# - hidden singles: a digit that fits in only one cell of a unit goes in that cell
+	# Every cell assigned is appended to trail. Returns 0 on a contradiction (a cell with no candidates, or a digit with
+	# nowhere left to go in some unit), 1 otherwise
+	def propagate(self, trail):
+		geo = self.geo
+		size = self.size
+		fullmask = self.fullmask
+		values = self.values
+		rowused = self.rowused
+		colused = self.colused
+		boxused = self.boxused
+		cellrow = geo.cellrow
+		cellcol = geo.cellcol
+		cellbox = self.cellbox
+		changed = 1
+		while changed:
+			changed = 0
+			# naked singles
+			for i in range(size*size):
+				if values[i] == 0:
+					r = cellrow[i]
+					c = cellcol[i]
+					cand = fullmask & ~(rowused[r] | colused[c] | boxused[cellbox[i]])
+					if cand == 0:
+						return 0
+					if cand & (cand - 1) == 0:
+						self.setcell(r, c, cand.bit_length())
+						trail.append(i)
+						changed = 1
+			# hidden singles: once has the digits that fit in some unassigned cell of the unit, twice those that fit in two or more
+			for unit in geo.units:
+				once = 0
+				twice = 0
+				placed = 0
+				for i in unit:
+					if values[i] != 0:
+						placed |= 1 << (values[i]-1)
+					else:
+						cand = fullmask & ~(rowused[cellrow[i]] | colused[cellcol[i]] | boxused[cellbox[i]])
+						twice |= once & cand
+						once |= cand
+				if once | placed != fullmask:
+					return 0
+				hidden = once & ~twice
+				while hidden != 0:
+					low = hidden & -hidden
+					hidden ^= low
+					for i in unit:
+						# skip if an earlier hidden single took the cell, the next pass will find the contradiction
+						if values[i] == 0 and (rowused[cellrow[i]] | colused[cellcol[i]] | boxused[cellbox[i]]) & low == 0:
+							self.setcell(cellrow[i], cellcol[i], low.bit_length())
+							trail.append(i)
+							changed = 1
+							break
+		return 1
+
+	# unassign the cells appended to trail after position mark
+	def undo(self, trail, mark):
+		geo = self.geo
+		while len(trail) > mark:
+			i = trail.pop()
+			self.setcell(geo.cellrow[i], geo.cellcol[i], 0)
+
+	# unassigned cell with the fewest candidates (first in row-major order on ties), -1 if the puzzle is full
+	# the scan stops at the first cell with at most stopat candidates
+	def findmostconstrained(self, stopat=2):
+		geo = self.geo
+		values = self.values
+		best = -1
+		bestcount = self.size + 1
+		for i in range(self.size*self.size):
+			if values[i] == 0:
+				count = (self.fullmask & ~self.conflicts(geo.cellrow[i], geo.cellcol[i])).bit_count()
+				if count < bestcount:
+					best = i
+					bestcount = count
+					# after propagation no cell has fewer than 2 candidates
+					if count <= stopat:
+						break
+		return best
+
+	# findmostconstrained with ties broken uniformly at random by rng (a random.Random) instead of by position
+	def findmostconstrainedrandom(self, rng):
+		geo = self.geo
+		values = self.values
+		best = -1
+		bestcount = self.size + 1
+		ties = 0
+		for i in range(self.size*self.size):
+			if values[i] == 0:
+				count = (self.fullmask & ~self.conflicts(geo.cellrow[i], geo.cellcol[i])).bit_count()
+				if count < bestcount:
+					best = i
+					bestcount = count
+					ties = 1
+				elif count == bestcount:
+					# reservoir sampling: the k-th tied cell replaces the choice with probability 1/k
+					ties += 1
+					if rng.randrange(ties) == 0:
+						best = i
+		return best
@@ -0,0 +1,191 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Symmetry Canonicalizing Solution Cache
+#################################
+
+# Puzzles that are the same up to the sudoku symmetries (digit relabeling, row permutations within a band, column
+# permutations within a stack, band swaps, stack swaps and transposition) have the same solutions up to the same
+# symmetry, so one solve answers all of them. canonicalform maps every puzzle of such a class to one representative
+# and CachedSolver keeps the solutions of recent representatives in front of a Solver
+
+import itertools
+from collections import OrderedDict
+from sudoku_bitset import puzzleboxsize
+from sudoku_solver import SolveResult, SOLVED, UNSATISFIABLE
+
+### Orderings ###
+# Rows (columns are rows of the transposed grid) are put in order of a signature that no symmetry other than moving
+# the row changes, bands likewise; only rows/bands with equal signatures can end up in either order, and every such
+# order is tried. With rowcounts[r] the given values of row r and colcounts[c] those of column c:
+# row r:  its count, the counts of its cells in each stack (sorted) and the column counts of its given cells (sorted)
+# band:   the row signatures of its rows (sorted) and the counts of its boxes (sorted)
+
+# groups of equal signature in sorted order: list of lists of items
+def tiegroups(items, signature):
+	items = sorted(items, key=signature)
+	groups = []
+	for item in items:
+		if len(groups) > 0 and signature(groups[-1][0]) == signature(item):
+			groups[-1].append(item)
+		else:
+			groups.append([item])
+	return groups
+
+# number of orders of the items of groups
+def ordercount(groups):
+	count = 1
+	for group in groups:
+		for k in range(2, len(group) + 1):
+			count *= k
+	return count
+
+# every order of the items of groups keeping the group order (list of tuples)
+def grouporders(groups):
+	orders = []
+	for choice in itertools.product(*[itertools.permutations(group) for group in groups]):
+		orders.append(tuple(item for group in choice for item in group))
+	return orders
+
+# list of the row orders of grid to try (lists of row indices), None if there are more than maxorderings
+# transposed is grid transposed (its columns as rows)
+def roworders(grid, transposed, boxsize, maxorderings):
+	size = boxsize*boxsize
+	rowcounts = [size - row.count(0) for row in grid]
+	colcounts = [size - col.count(0) for col in transposed]
+	rowsig = []
+	stackcounts = []
+	for r in range(size):
+		row = grid[r]
+		counts = [boxsize - row[s:s + boxsize].count(0) for s in range(0, size, boxsize)]
+		stackcounts.append(counts)
+		rowsig.append((rowcounts[r], sorted(counts), sorted(colcounts[c] for c in range(size) if row[c] != 0)))
+	bandsig = []
+	for b in range(0, size, boxsize):
+		boxcounts = sorted(sum(stackcounts[r][s] for r in range(b, b + boxsize)) for s in range(boxsize))
+		bandsig.append((sorted(rowsig[b:b + boxsize]), boxcounts))
+	bandgroups = tiegroups(range(boxsize), lambda b: bandsig[b])
+	rowgroups = [tiegroups(range(b*boxsize, b*boxsize + boxsize), lambda r: rowsig[r]) for b in range(boxsize)]
+	count = ordercount(bandgroups)
+	for groups in rowgroups:
+		count *= ordercount(groups)
+	if count > maxorderings:
+		return None
+	inband = [grouporders(groups) for groups in rowgroups]
+	orders = []
+	for bands in grouporders(bandgroups):
+		for choice in itertools.product(*[inband[b] for b in bands]):
+			orders.append([r for rows in choice for r in rows])
+	return orders
+
+### canonicalform ###
+# Returns (key, transform) for puzzle (N rows of N values), or None when the signatures leave more than maxorderings
+# arrangements to compare (puzzles with few givens), in which case the puzzle should just be solved
+# key is the smallest of the arrangements (transposed or not, every tied row and column order) as a tuple of N*N values
+# after relabeling the digits in order of first appearance. Puzzles get the same key exactly when one is a symmetry of
+# the other. transform = (transposed, rows, cols, labels) gives key[i*N + j] = labels[grid[rows[i]][cols[j]]] with grid
+# the puzzle, transposed if transposed is set; labels maps every digit of the puzzle to its canonical digit
+def canonicalform(puzzle, maxorderings=64):
+	boxsize = puzzleboxsize(puzzle)
+	size = boxsize*boxsize
+	grid = [list(row) for row in puzzle]
+	transposed = [list(col) for col in zip(*grid)]
+	# the row orders of the transposed grid are the column orders of the grid and the other way round
+	roworder = roworders(grid, transposed, boxsize, maxorderings)
+	if roworder is None:
+		return None
+	colorder = roworders(transposed, grid, boxsize, maxorderings // len(roworder))
+	if colorder is None:
+		return None
+	best = None
+	for flip, rowlist, collist, lines in ((False, roworder, colorder, grid), (True, colorder, roworder, transposed)):
+		for rows in rowlist:
+			arranged = [lines[r] for r in rows]
+			for cols in collist:
+				labels = {0: 0}
+				key = []
+				for row in arranged:
+					for c in cols:
+						value = row[c]
+						if value not in labels:
+							labels[value] = len(labels)
+						key.append(labels[value])
+				key = tuple(key)
+				if best is None or key < best[0]:
+					best = (key, (flip, rows, cols, labels))
+	# digits missing from the puzzle are interchangeable, give them the labels left in increasing order
+	labels = best[1][3]
+	for digit in range(1, size + 1):
+		if digit not in labels:
+			labels[digit] = len(labels)
+	return best
+
+# grid in canonical arrangement and labels
+def totransform(grid, transform):
+	transposed, rows, cols, labels = transform
+	if transposed:
+		grid = [list(col) for col in zip(*grid)]
+	return [[labels[grid[r][c]] for c in cols] for r in rows]
+
+# grid in canonical arrangement and labels back to the arrangement and labels of the puzzle of transform
+def fromtransform(grid, transform):
+	transposed, rows, cols, labels = transform
+	digits = dict((label, digit) for digit, label in labels.items())
+	size = len(grid)
+	result = [[0] * size for r in range(size)]
+	for i in range(size):
+		for j in range(size):
+			result[rows[i]][cols[j]] = digits[grid[i][j]]
+	if transposed:
+		result = [list(col) for col in zip(*result)]
+	return result
+
+### CachedSolver ###
+# Solves through solver (a Solver, or anything with Solver's solve returning a SolveResult), remembering the outcome of
+# the last capacity canonical forms, least recently used evicted first
+# A hit returns the cached solution mapped back through the inverse transform, with 0 assignments and backtracks
+# Only solved and unsatisfiable outcomes are cached (both hold for every symmetry of a puzzle, running out of
+# iterations does not). Puzzles canonicalform gives up on are solved directly and counted in bypasses
+class CachedSolver:
+	def __init__(self, solver, capacity=4096, maxorderings=64):
+		self.solver = solver
+		self.capacity = capacity
+		self.maxorderings = maxorderings
+		# canonical key -> (status, canonical solution or None)
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.bypasses = 0
+
+	# timeout, nodes and cancel are passed on to the solver (see Solver.solve), a stopped solve is not cached
+	def solve(self, puzzle, timeout=None, nodes=None, cancel=None):
+		form = canonicalform(puzzle, self.maxorderings)
+		if form is None:
+			self.bypasses += 1
+			return self.solver.solve(puzzle, timeout, nodes, cancel)
+		key, transform = form
+		if key in self.entries:
+			self.entries.move_to_end(key)
+			self.hits += 1
+			status, solution = self.entries[key]
+			if solution is not None:
+				solution = fromtransform(solution, transform)
+			return SolveResult(solution, status, 0, 0)
+		self.misses += 1
+		result = self.solver.solve(puzzle, timeout, nodes, cancel)
+		if result.status == SOLVED or result.status == UNSATISFIABLE:
+			solution = None
+			if result.solution is not None:
+				solution = totransform(result.solution, transform)
+			self.entries[key] = (result.status, solution)
+			if len(self.entries) > self.capacity:
+				self.entries.popitem(last=False)
+				self.evictions += 1
+		return result
+
+	def clear(self):
+		self.entries.clear()
+
+	def __repr__(self):
+		return 'CachedSolver(%d/%d entries, hits=%d, misses=%d, evictions=%d, bypasses=%d)' % (len(self.entries),
+			self.capacity, self.hits, self.misses, self.evictions, self.bypasses)
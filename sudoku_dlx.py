@@ -0,0 +1,357 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Dancing Links Backend
+#################################
+
+# Sudoku as an exact cover problem solved with Knuth's Algorithm X on dancing links
+# Matrix rows are the N*N*N choices (cell, digit), columns the 4*N*N constraints every solution covers exactly once:
+# each cell holds one digit, and each row, column and box holds each digit once (324 columns x 729 rows for 9x9)
+# With boxes=False the box columns are left out, giving the row/column only rules of sudoku.py
+
+### DancingLinks ###
+# The whole matrix lives in flat lists indexed by node: L/R/U/D are the left/right/up/down links, C is the column
+# header of the node and rowof its matrix row. Node 0 is the root, nodes 1..ncols the column headers (S holds the
+# number of nodes left in each column), then ROWWIDTH nodes per matrix row starting at rownode[row]
+# Built once and reused: every cover made during a solve is uncovered before solve returns, so the links are back
+# in their original state for the next puzzle
+class DancingLinks:
+	def __init__(self, boxsize, boxes=True):
+		size = boxsize*boxsize
+		self.boxsize = boxsize
+		self.size = size
+		self.boxes = boxes
+		if boxes:
+			self.rowwidth = 4
+		else:
+			self.rowwidth = 3
+		ncols = self.rowwidth*size*size
+		nrows = size*size*size
+		nnodes = 1 + ncols + self.rowwidth*nrows
+		self.ncols = ncols
+		self.L = [0] * nnodes
+		self.R = [0] * nnodes
+		self.U = [0] * nnodes
+		self.D = [0] * nnodes
+		self.C = [0] * nnodes
+		self.S = [0] * (ncols+1)
+		self.rowof = [0] * nnodes
+		self.rownode = [0] * nrows
+		L = self.L
+		R = self.R
+		U = self.U
+		D = self.D
+		C = self.C
+		# root and column headers in one circular list
+		for c in range(ncols+1):
+			L[c] = c - 1
+			R[c] = c + 1
+			U[c] = c
+			D[c] = c
+			C[c] = c
+		L[0] = ncols
+		R[ncols] = 0
+		node = ncols + 1
+		for row in range(nrows):
+			cell, digit = divmod(row, size)
+			r, c = divmod(cell, size)
+			columns = [1 + cell, 1 + size*size + r*size + digit, 1 + 2*size*size + c*size + digit]
+			if boxes:
+				b = (r//boxsize)*boxsize + c//boxsize
+				columns.append(1 + 3*size*size + b*size + digit)
+			self.rownode[row] = node
+			for k in range(len(columns)):
+				col = columns[k]
+				C[node] = col
+				self.rowof[node] = row
+				# append to the bottom of the column
+				U[node] = U[col]
+				D[node] = col
+				D[U[col]] = node
+				U[col] = node
+				self.S[col] += 1
+				# link into the circular row
+				L[node] = node - 1
+				R[node] = node + 1
+				node += 1
+			L[node - len(columns)] = node - 1
+			R[node - 1] = node - len(columns)
+		# search stack, one level per cell: node selected and column covered at each level
+		self.levelnode = [0] * (size*size)
+		self.levelcol = [0] * (size*size)
+
+	# remove column c from the header list and every row that has a node in c from the other columns
+	def cover(self, c):
+		L = self.L
+		R = self.R
+		U = self.U
+		D = self.D
+		C = self.C
+		S = self.S
+		L[R[c]] = L[c]
+		R[L[c]] = R[c]
+		i = D[c]
+		while i != c:
+			j = R[i]
+			while j != i:
+				U[D[j]] = U[j]
+				D[U[j]] = D[j]
+				S[C[j]] -= 1
+				j = R[j]
+			i = D[i]
+
+	# exact reverse of cover(c)
+	def uncover(self, c):
+		L = self.L
+		R = self.R
+		U = self.U
+		D = self.D
+		C = self.C
+		S = self.S
+		i = U[c]
+		while i != c:
+			j = L[i]
+			while j != i:
+				S[C[j]] += 1
+				U[D[j]] = j
+				D[U[j]] = j
+				j = L[j]
+			i = U[i]
+		L[R[c]] = c
+		R[L[c]] = c
+
+	### solve ###
+	# puzzle is a list of N rows of N values (0 for unassigned), maxiter the maximum rows tried before giving up
+	# Returns (result, assignments, backtracks, solution) with result 0 (solved), -1 (no solution) or -2 (maximum iterations)
+	# as in sudoku.py. assignments counts rows selected by the search (the givens are not counted) and backtracks
+	# counts rows that were selected and then taken back
+	# With a checkpoint (Solver.checkpoint) maxiter only runs to the first check: checkpoint() then returns the
+	# iterations to the next check, or the negative result to stop with (-2, or -3 for cancelled)
+	def solve(self, puzzle, maxiter, checkpoint=None):
+		steps = self.solvesteps(puzzle, maxiter, checkpoint)
+		while True:
+			try:
+				next(steps)
+			except StopIteration as stop:
+				return stop.value
+
+	# solve as a generator that yields just before every checkpoint call (see Solver.solvesteps)
+	def solvesteps(self, puzzle, maxiter, checkpoint=None):
+		size = self.size
+		L = self.L
+		R = self.R
+		D = self.D
+		C = self.C
+		S = self.S
+		levelnode = self.levelnode
+		levelcol = self.levelcol
+		cover = self.cover
+		uncover = self.uncover
+		assignments = 0
+		backtracks = 0
+		iterleft = maxiter
+		# select the rows of the given values, a column already covered means two givens clash
+		givens = []
+		result = 1
+		for r in range(size):
+			for c in range(size):
+				value = puzzle[r][c]
+				if value != 0 and result == 1:
+					node = self.rownode[(r*size + c)*size + value - 1]
+					j = node
+					while True:
+						if R[L[C[j]]] != C[j]:
+							result = -1
+						j = R[j]
+						if j == node:
+							break
+					if result == 1:
+						j = node
+						while True:
+							cover(C[j])
+							j = R[j]
+							if j == node:
+								break
+						givens.append(node)
+		depth = 0
+		while result == 1:
+			if R[0] == 0:
+				result = 0
+				break
+			# column with the fewest rows left (first one on ties)
+			best = R[0]
+			c = R[best]
+			while c != 0 and S[best] > 1:
+				if S[c] < S[best]:
+					best = c
+				c = R[c]
+			cover(best)
+			levelcol[depth] = best
+			node = D[best]
+			# try the rows of column best in turn, backing up a level whenever a column runs out of rows
+			while True:
+				iterleft -= 1
+				if iterleft == 0:
+					if checkpoint is None:
+						result = -2
+						break
+					yield
+					iterleft = checkpoint()
+					if iterleft < 0:
+						result = iterleft
+						break
+				if node != levelcol[depth]:
+					break
+				uncover(levelcol[depth])
+				if depth == 0:
+					result = -1
+					break
+				depth -= 1
+				node = levelnode[depth]
+				j = L[node]
+				while j != node:
+					uncover(C[j])
+					j = L[j]
+				backtracks += 1
+				node = D[node]
+			if result != 1:
+				break
+			levelnode[depth] = node
+			j = R[node]
+			while j != node:
+				cover(C[j])
+				j = R[j]
+			assignments += 1
+			depth += 1
+		solution = None
+		if result == 0:
+			solution = [list(row) for row in puzzle]
+			for k in range(depth):
+				cell, digit = divmod(self.rowof[levelnode[k]], size)
+				solution[cell // size][cell % size] = digit + 1
+		# put the links back: undo the search levels still on the stack, then the givens
+		# (stopped early, the column of the current level is covered but none of its rows is selected)
+		if result < -1:
+			uncover(levelcol[depth])
+		if result < -1 or result == 0:
+			for k in range(depth-1, -1, -1):
+				node = levelnode[k]
+				j = L[node]
+				while j != node:
+					uncover(C[j])
+					j = L[j]
+				uncover(levelcol[k])
+		for node in reversed(givens):
+			j = L[node]
+			while True:
+				uncover(C[j])
+				if j == node:
+					break
+				j = L[j]
+		return result, assignments, backtracks, solution
+
+	### Solution enumeration ###
+	# Generator that yields once for every solution of puzzle, in search order, with the search stack holding it: the
+	# value yielded is the depth, and solutiongrid(puzzle, depth) builds the grid. Nothing else is kept between two
+	# solutions, so memory stays the same however many are taken. The links are put back when the generator runs out
+	# or is closed (close it, or let it go, to stop early)
+	def searchsolutions(self, puzzle):
+		size = self.size
+		L = self.L
+		R = self.R
+		D = self.D
+		C = self.C
+		S = self.S
+		levelnode = self.levelnode
+		levelcol = self.levelcol
+		cover = self.cover
+		uncover = self.uncover
+		givens = []
+		depth = 0
+		try:
+			for r in range(size):
+				for c in range(size):
+					value = puzzle[r][c]
+					if value != 0:
+						node = self.rownode[(r*size + c)*size + value - 1]
+						j = node
+						while True:
+							if R[L[C[j]]] != C[j]:
+								# two givens clash, no solutions
+								return
+							j = R[j]
+							if j == node:
+								break
+						j = node
+						while True:
+							cover(C[j])
+							j = R[j]
+							if j == node:
+								break
+						givens.append(node)
+			while True:
+				if R[0] == 0:
+					yield depth
+					# go on with the next row of the deepest level
+					if depth == 0:
+						return
+					depth -= 1
+					node = levelnode[depth]
+					j = L[node]
+					while j != node:
+						uncover(C[j])
+						j = L[j]
+					node = D[node]
+				else:
+					# column with the fewest rows left (first one on ties)
+					best = R[0]
+					c = R[best]
+					while c != 0 and S[best] > 1:
+						if S[c] < S[best]:
+							best = c
+						c = R[c]
+					cover(best)
+					levelcol[depth] = best
+					node = D[best]
+				# back up a level whenever a column runs out of rows
+				while node == levelcol[depth]:
+					uncover(levelcol[depth])
+					if depth == 0:
+						return
+					depth -= 1
+					node = levelnode[depth]
+					j = L[node]
+					while j != node:
+						uncover(C[j])
+						j = L[j]
+					node = D[node]
+				levelnode[depth] = node
+				j = R[node]
+				while j != node:
+					cover(C[j])
+					j = R[j]
+				depth += 1
+		finally:
+			# stopped at a solution, levels 0..depth-1 have a row selected and their column covered (run out, depth is 0)
+			for k in range(depth-1, -1, -1):
+				node = levelnode[k]
+				j = L[node]
+				while j != node:
+					uncover(C[j])
+					j = L[j]
+				uncover(levelcol[k])
+			for node in reversed(givens):
+				j = L[node]
+				while True:
+					uncover(C[j])
+					if j == node:
+						break
+					j = L[j]
+
+	# the solution of puzzle on the search stack when searchsolutions yields depth, as a new list of rows
+	def solutiongrid(self, puzzle, depth):
+		size = self.size
+		solution = [list(row) for row in puzzle]
+		for k in range(depth):
+			cell, digit = divmod(self.rowof[self.levelnode[k]], size)
+			solution[cell // size][cell % size] = digit + 1
+		return solution
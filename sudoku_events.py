@@ -0,0 +1,107 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Search Events
+#################################
+
+# Events a Solver reports to its sink during search: sink.event(kind, depth, cell, value) with cell = r*N + c
+# NODE       the search opens a new stack frame for cell (value 0)
+# ASSIGN     value is assigned to cell and kept (counted in callcounter)
+# WIPEOUT    assigning value to cell left some cell with no candidates (forward checking or propagation failed)
+# BACKTRACK  the search takes value back from cell at depth (counted in backtrackcounter)
+# SOLUTION   the puzzle is solved, cell and value are those of the last assignment (-1 and 0 if there was none)
+# With no sink attached a Solver only tests one local variable against None at every event site
+
+import struct
+
+NODE = 0
+ASSIGN = 1
+WIPEOUT = 2
+BACKTRACK = 3
+SOLUTION = 4
+EVENTNAMES = ('node', 'assign', 'wipeout', 'backtrack', 'solution')
+
+### CounterSink ###
+# counts[kind] is the number of events of each kind, summed over every solve the sink saw
+class CounterSink:
+	def __init__(self):
+		self.counts = [0] * len(EVENTNAMES)
+
+	def event(self, kind, depth, cell, value):
+		self.counts[kind] += 1
+
+	def __repr__(self):
+		return 'CounterSink(%s)' % ', '.join('%s=%d' % (EVENTNAMES[kind], self.counts[kind]) for kind in range(len(EVENTNAMES)))
+
+### DepthHistogramSink ###
+# histogram[d] is the number of events of kind (backtracks by default) at depth d
+class DepthHistogramSink:
+	def __init__(self, kind=BACKTRACK):
+		self.kind = kind
+		self.histogram = []
+
+	def event(self, kind, depth, cell, value):
+		if kind == self.kind:
+			while len(self.histogram) <= depth:
+				self.histogram.append(0)
+			self.histogram[depth] += 1
+
+### BinaryTraceSink ###
+# Appends every event to a file as a 7 byte record (kind uint8, depth uint16, cell uint16, value uint16, little endian,
+# a cell of -1 is written as 65535), buffered in memory and written bufsize bytes at a time. close() writes the rest
+# stream is a path or a file opened in binary mode (left open by close)
+RECORD = struct.Struct('<BHHH')
+
+class BinaryTraceSink:
+	def __init__(self, stream, bufsize=1 << 16):
+		if isinstance(stream, str):
+			self.stream = open(stream, 'wb')
+			self.owned = True
+		else:
+			self.stream = stream
+			self.owned = False
+		self.bufsize = bufsize
+		self.buffer = bytearray()
+		self.events = 0
+
+	def event(self, kind, depth, cell, value):
+		self.buffer += RECORD.pack(kind, depth, cell & 0xffff, value)
+		self.events += 1
+		if len(self.buffer) >= self.bufsize:
+			self.flush()
+
+	def flush(self):
+		self.stream.write(self.buffer)
+		del self.buffer[:]
+
+	def close(self):
+		self.flush()
+		if self.owned:
+			self.stream.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+# generator of the (kind, depth, cell, value) events of a trace file written by BinaryTraceSink
+def readtrace(path):
+	with open(path, 'rb') as f:
+		while True:
+			data = f.read(RECORD.size * 4096)
+			if not data:
+				break
+			for kind, depth, cell, value in RECORD.iter_unpack(data):
+				if cell == 0xffff:
+					cell = -1
+				yield kind, depth, cell, value
+
+### FanoutSink ###
+# passes every event on to each of sinks
+class FanoutSink:
+	def __init__(self, sinks):
+		self.events = [sink.event for sink in sinks]
+
+	def event(self, kind, depth, cell, value):
+		for event in self.events:
+			event(kind, depth, cell, value)
@@ -0,0 +1,209 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Puzzle Generator
+#################################
+
+# Generates puzzles with a unique solution on all cores, streaming them into a problems tree or a bulk file
+# usage: python sudoku_generate.py --count 1000 [--clues 24 30 40] (--root generated | --output puzzles.txt)
+#        [--effort MIN MAX] [--measure heuristics] [--boxsize 3] [--processes N] [--seed 1]
+#
+# Every puzzle starts from a filled grid found by a randomized search (propagate with random tie-breaking and value
+# order) and loses clues one at a time in random order, each removal kept only if the puzzle still has a unique
+# solution. Without a clue target removal goes on until no clue can go, giving a minimal puzzle (22 to 26 clues for
+# 9x9); with one it stops at that many clues, and a grid whose minimal puzzles still have more is dropped for a new one
+# The uniqueness check first propagates singles, which decides most removals on its own (a puzzle singles fill in is
+# unique), and only counts solutions with dancing links (Solver.isunique) when propagation gets stuck
+# effort: only keep puzzles that measure (a Solver variant) solves in MIN to MAX assignments, retrying otherwise
+#
+# --count puzzles are made per clue count of --clues (or in total for minimal puzzles). With --root they go to
+# <root>/<clues>/<n>.sd numbered after the files already there, with --output one per line (grids for N > 9)
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from sudoku_solver import Solver, VARIANTS, SOLVED
+from sudoku_bitset import BitsetDomains
+from sudoku_io import formatpuzzle
+
+### Generation ###
+# filled N x N grid (N = boxsize*boxsize) found by a randomized search seeded from rng
+def randomgrid(boxsize, rng):
+	size = boxsize*boxsize
+	empty = [[0] * size for r in range(size)]
+	while True:
+		solver = Solver('propagate', 100000, valueorder='random', seed=rng.randrange(1 << 30), restartunit=64)
+		result = solver.solve(empty)
+		if result.status == SOLVED:
+			return result.solution
+
+# True if puzzle has a single solution: propagating singles fills it in, or dancing links finds no second solution
+def unique(puzzle, solver):
+	domains = BitsetDomains(puzzle, solver.boxes)
+	if domains.propagate([]) == 1 and domains.findmostconstrained() == -1:
+		return True
+	return solver.isunique(puzzle)
+
+# remove clues of grid (a filled grid, changed in place) in random order while the solution stays unique, stopping at
+# clues clues (0 to go on until no clue can be removed). Returns the number of clues left
+def removeclues(grid, rng, solver, clues=0):
+	size = len(grid)
+	cells = list(range(size*size))
+	rng.shuffle(cells)
+	left = size*size
+	for i in cells:
+		if left <= clues:
+			break
+		r, c = divmod(i, size)
+		value = grid[r][c]
+		grid[r][c] = 0
+		if unique(grid, solver):
+			left -= 1
+		else:
+			grid[r][c] = value
+	return left
+
+# a new puzzle, or None after attempts grids without a puzzle meeting the targets
+# clues: exact clue count (0 for a minimal puzzle), effort: (MIN, MAX) assignments of measure, or None
+def generate(boxsize, rng, solver, clues=0, effort=None, measure=None, attempts=100):
+	for attempt in range(attempts):
+		puzzle = randomgrid(boxsize, rng)
+		left = removeclues(puzzle, rng, solver, clues)
+		if clues > 0 and left != clues:
+			continue
+		if effort is not None:
+			assignments = measure.solve(puzzle).assignments
+			if assignments < effort[0] or assignments > effort[1]:
+				continue
+		return puzzle
+	return None
+
+### Workers ###
+# A task is (seed, count, boxsize, clues, effort, measure variant, attempts) and makes count puzzles, returned as a list
+# of (clues, puzzle) with a puzzle of None for each one that ran out of attempts
+# Solvers of the current worker process, built on the first task and kept for later ones
+workersolvers = {}
+
+def generatetask(task):
+	seed, count, boxsize, clues, effort, measure, attempts = task
+	for variant in ('dlx', measure):
+		if variant not in workersolvers:
+			workersolvers[variant] = Solver(variant)
+	rng = random.Random(seed)
+	results = []
+	for k in range(count):
+		puzzle = generate(boxsize, rng, workersolvers['dlx'], clues, effort, workersolvers[measure], attempts)
+		if puzzle is None:
+			results.append((clues, None))
+		else:
+			results.append((sum(1 for row in puzzle for value in row if value != 0), puzzle))
+	return results
+
+# tasks of chunk puzzles each making count puzzles for every clue count of clues, seeded in order from seed
+def generatetasks(count, clues, boxsize, effort, measure, attempts, seed, chunk):
+	index = 0
+	for target in clues:
+		for start in range(0, count, chunk):
+			yield (seed*1000003 + index, min(chunk, count - start), boxsize, target, effort, measure, attempts)
+			index += 1
+
+# Generator of the results of tasks as they finish (in completion order), over processes worker processes (one per
+# core by default, 1 to run in this process)
+def rungenerate(tasks, processes=None):
+	if processes is None:
+		processes = os.cpu_count() or 1
+	if processes == 1:
+		for task in tasks:
+			yield from generatetask(task)
+		return
+	with multiprocessing.Pool(processes) as pool:
+		for results in pool.imap_unordered(generatetask, tasks):
+			yield from results
+
+### Output ###
+# Writes puzzles into <root>/<clues>/<n>.sd, n counting on from the highest file number already in that directory
+class TreeWriter:
+	def __init__(self, root):
+		self.root = root
+		# clue count -> last file number used
+		self.last = {}
+
+	def write(self, puzzle, clues):
+		directory = os.path.join(self.root, str(clues))
+		if clues not in self.last:
+			os.makedirs(directory, exist_ok=True)
+			numbers = [int(name[:-3]) for name in os.listdir(directory) if name.endswith('.sd') and name[:-3].isdigit()]
+			self.last[clues] = max(numbers, default=0)
+		self.last[clues] += 1
+		with open(os.path.join(directory, '%d.sd' % self.last[clues]), 'w') as f:
+			f.write(''.join(' '.join(str(value) for value in row) + ' \n' for row in puzzle) + '\n')
+
+	def close(self):
+		pass
+
+# Writes puzzles to one file (or stdout for -), in the line format of sudoku_io.py for N <= 9 and as grids otherwise
+class BulkWriter:
+	def __init__(self, path):
+		if path == '-':
+			self.stream = sys.stdout
+		else:
+			self.stream = open(path, 'a')
+
+	def write(self, puzzle, clues):
+		if len(puzzle) <= 9:
+			self.stream.write(formatpuzzle(puzzle, 'line'))
+		else:
+			self.stream.write(formatpuzzle(puzzle, 'grid'))
+
+	def close(self):
+		if self.stream is not sys.stdout:
+			self.stream.close()
+		else:
+			self.stream.flush()
+
+def main():
+	parser = argparse.ArgumentParser(description='Generate puzzles with a unique solution into a problems tree or a bulk file')
+	parser.add_argument('--count', type=int, default=10, help='puzzles per clue count (in total without --clues)')
+	parser.add_argument('--clues', type=int, nargs='+', default=[0], help='clue counts to make (0 for minimal puzzles)')
+	parser.add_argument('--effort', type=int, nargs=2, metavar=('MIN', 'MAX'), help='assignments of --measure to accept')
+	parser.add_argument('--measure', default='heuristics', choices=VARIANTS, help='solver variant the effort is measured with')
+	parser.add_argument('--boxsize', type=int, default=3)
+	parser.add_argument('--attempts', type=int, default=100, help='grids to try per puzzle before giving up')
+	# no default, so a bare run never adds puzzles to the shipped problems corpus
+	destination = parser.add_mutually_exclusive_group(required=True)
+	destination.add_argument('--root', help='problems tree to add the puzzles to')
+	destination.add_argument('--output', help='bulk file to append the puzzles to instead (- for stdout)')
+	parser.add_argument('--processes', type=int, default=None)
+	parser.add_argument('--chunk', type=int, default=16, help='puzzles per worker task')
+	parser.add_argument('--seed', type=int, default=1)
+	args = parser.parse_args()
+
+	if args.output is not None:
+		writer = BulkWriter(args.output)
+	else:
+		writer = TreeWriter(args.root)
+	tasks = generatetasks(args.count, args.clues, args.boxsize, args.effort, args.measure, args.attempts, args.seed,
+		args.chunk)
+	start = time.perf_counter()
+	made = {}
+	failed = 0
+	try:
+		for clues, puzzle in rungenerate(tasks, args.processes):
+			if puzzle is None:
+				failed += 1
+				continue
+			writer.write(puzzle, clues)
+			made[clues] = made.get(clues, 0) + 1
+	finally:
+		writer.close()
+	elapsed = time.perf_counter() - start
+	total = sum(made.values())
+	sys.stderr.write('%d puzzles in %.2fs (%.1f puzzles/s), by clue count: %s\n' % (total, elapsed, total / max(elapsed, 1e-9),
+		', '.join('%d: %d' % (clues, made[clues]) for clues in sorted(made))))
+	if failed > 0:
+		sys.stderr.write('%d puzzles not made within %d grids each\n' % (failed, args.attempts))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,107 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Streaming Puzzle Input/Output
+#################################
+
+# Reads puzzles one after another from a binary stream, in either of two formats (mixed freely in one stream):
+# grid: N lines of N whitespace separated values (0 for unassigned) as in the .sd files, N = 4, 9, 16, 25, ...
+#       blank lines between grids are skipped
+# line: one puzzle per line, N*N characters with '0' or '.' for unassigned (N = 4 or 9, one character per value)
+# Lines starting with '#' are comments
+# The stream is read chunksize bytes at a time and every chunk is split into lines and decoded in bulk, so the
+# memory used stays the same however many puzzles the stream holds
+
+# maps the characters of a value to the value itself (bytes.translate), '.' and '0' to 0
+VALUETABLE = bytearray(range(256))
+for digit in range(10):
+	VALUETABLE[ord('0') + digit] = digit
+VALUETABLE[ord('.')] = 0
+VALUETABLE = bytes(VALUETABLE)
+
+# grid sizes of the line format by line length
+LINESIZES = {16: 4, 81: 9}
+
+WHITESPACE = b' \t\r\n'
+
+### readpuzzles ###
+# Generator of (kind, grid) for every puzzle of stream (opened in binary mode) where kind is 'grid' or 'line' and
+# grid is a list of N rows of N values. Raises ValueError on malformed input, naming the line
+def readpuzzles(stream, chunksize=1 << 20):
+	rest = b''
+	# rows of the grid being read, possibly over several chunks
+	rows = []
+	size = 0
+	lineno = 0
+	while True:
+		data = stream.read(chunksize)
+		if data:
+			lines = (rest + data).split(b'\n')
+			rest = lines.pop()
+		else:
+			lines = [rest]
+		# consecutive line format puzzles of one length are decoded together
+		run = []
+		runlength = 0
+		for line in lines:
+			lineno += 1
+			line = line.strip()
+			if len(line) == 0 or line[0] == ord('#'):
+				continue
+			if len(rows) == 0 and len(line) in LINESIZES and len(line.translate(None, b'.0123456789')) == 0:
+				if len(line) != runlength and len(run) > 0:
+					yield from linepuzzles(run, runlength)
+					run = []
+				run.append(line)
+				runlength = len(line)
+				continue
+			if len(run) > 0:
+				yield from linepuzzles(run, runlength)
+				run = []
+			if len(rows) == 0:
+				size = len(line.split())
+			rows.append(line)
+			if len(rows) == size:
+				yield 'grid', gridpuzzle(rows, size, lineno)
+				rows = []
+		if len(run) > 0:
+			yield from linepuzzles(run, runlength)
+		if not data:
+			break
+	if len(rows) > 0:
+		raise ValueError('line %d: input ends inside a grid (%d of %d rows)' % (lineno, len(rows), size))
+
+# the puzzles of a run of line format puzzles of length length
+def linepuzzles(run, length):
+	size = LINESIZES[length]
+	values = b''.join(run).translate(VALUETABLE)
+	for start in range(0, len(values), length):
+		yield 'line', [list(values[start + r*size:start + r*size + size]) for r in range(size)]
+
+# grid from its N rows (bytes), lineno is the line of the last row
+def gridpuzzle(rows, size, lineno):
+	# one character per value (N values and N characters besides whitespace on every row): drop the whitespace and
+	# decode all values in one go
+	if size < 10 and all(len(row.split()) == size and len(row.translate(None, WHITESPACE)) == size for row in rows):
+		values = b''.join(rows).translate(VALUETABLE, WHITESPACE)
+		if max(values) <= 9:
+			return [list(values[r*size:r*size + size]) for r in range(size)]
+	grid = []
+	for r in range(size):
+		row = [int(value) for value in rows[r].split()]
+		if len(row) != size:
+			raise ValueError('line %d: grid row has %d values, expected %d' % (lineno - size + r + 1, len(row), size))
+		grid.append(row)
+	return grid
+
+### formatpuzzle ###
+# Text of grid (with a trailing newline) in format kind: 'line' (N = 4 or 9 only) or 'grid' (.sd, plus a blank line)
+def formatpuzzle(grid, kind):
+	if kind == 'line':
+		return ''.join(str(value) for row in grid for value in row) + '\n'
+	return '\n'.join(' '.join(str(value) for value in row) for row in grid) + '\n\n'
+
+### solvestream ###
+# Generator pipeline: solves every (kind, grid) of records with solver as it is pulled, yields (kind, grid, result)
+def solvestream(records, solver):
+	for kind, grid in records:
+		yield kind, grid, solver.solve(grid)
@@ -0,0 +1,111 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Nogood Store
+#################################
+
+# Nogoods learned by the cbj variant of Solver: sets of assignments that cannot all hold in any solution of the puzzle
+# being solved. An assignment (literal) is the integer i*N + value - 1 for value in cell i of an N x N grid, a nogood
+# the sorted tuple of its literals
+# The store keeps the last capacity nogoods learned or used, least recently used evicted first, and indexes them by
+# literal so that checking an assignment only looks at the nogoods that contain it
+# usage: python sudoku_nogoods.py [--root problems] [--noboxes] [--select fwdcheck] [--nogoods 1024] [--nogoodsize 8]
+#        compares heuristics and cbj (with and without nogoods) on the corpus puzzles where the --select variant (plain
+#        forward checking by default) hits maxiter
+
+from collections import OrderedDict
+
+### NogoodStore ###
+class NogoodStore:
+	def __init__(self, capacity=1024):
+		self.capacity = capacity
+		self.entries = OrderedDict()
+		# literal -> set of the stored nogoods containing it
+		self.index = {}
+		self.learned = 0
+		self.hits = 0
+		self.evictions = 0
+
+	# store nogood (sorted tuple of literals), refreshing it if it is already stored
+	def add(self, nogood):
+		if nogood in self.entries:
+			self.entries.move_to_end(nogood)
+			return
+		self.entries[nogood] = None
+		self.learned += 1
+		for literal in nogood:
+			if literal in self.index:
+				self.index[literal].add(nogood)
+			else:
+				self.index[literal] = set([nogood])
+		if len(self.entries) > self.capacity:
+			old, unused = self.entries.popitem(last=False)
+			for literal in old:
+				self.index[literal].discard(old)
+			self.evictions += 1
+
+	# a stored nogood containing literal whose every literal holds in values (the cell values of an N x N grid, in
+	# row-major order), None if there is none. literal is the assignment just made, so only nogoods with it can have
+	# become violated
+	def violated(self, literal, values, size):
+		nogoods = self.index.get(literal)
+		if not nogoods:
+			return None
+		for nogood in nogoods:
+			for other in nogood:
+				if values[other // size] != other % size + 1:
+					break
+			else:
+				self.entries.move_to_end(nogood)
+				self.hits += 1
+				return nogood
+		return None
+
+	# forget every nogood (the cbj variant does at the start of each solve, nogoods only hold for their own puzzle)
+	# learned, hits and evictions are cumulative over the life of the store and are not reset
+	def clear(self):
+		self.entries.clear()
+		self.index.clear()
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __repr__(self):
+		return 'NogoodStore(%d/%d nogoods, learned=%d, hits=%d, evictions=%d)' % (len(self.entries), self.capacity,
+			self.learned, self.hits, self.evictions)
+
+def main():
+	# imported here, sudoku_solver imports this module (and so does every solve, which has no use for argparse)
+	import argparse
+	from sudoku_solver import Solver, VARIANTS, SOLVED, readpuzzle
+	from sudoku_runner import corpusjobs
+
+	parser = argparse.ArgumentParser(
+		description='Assignments of cbj on the puzzles a simpler search runs out of iterations on')
+	parser.add_argument('--root', default='problems')
+	parser.add_argument('--maxiter', type=int, default=10000)
+	parser.add_argument('--noboxes', action='store_true', help='row/column constraints only, as in results.txt')
+	parser.add_argument('--select', default='fwdcheck', choices=VARIANTS,
+		help='variant whose unsolved puzzles are compared (heuristics solves every corpus puzzle with boxes)')
+	parser.add_argument('--nogoods', type=int, default=1024, help='nogood store capacity')
+	parser.add_argument('--nogoodsize', type=int, default=8, help='most assignments in a stored nogood')
+	args = parser.parse_args()
+
+	boxes = not args.noboxes
+	puzzles = [readpuzzle(job[1]) for job in corpusjobs(['heuristics'], args.root)]
+	select = Solver(args.select, args.maxiter, boxes)
+	capped = []
+	for puzzle in puzzles:
+		if select.solve(puzzle).status != SOLVED:
+			capped.append(puzzle)
+	print('%d of %d puzzles not solved by %s in %d iterations' % (len(capped), len(puzzles), args.select, args.maxiter))
+	solvers = (('heuristics', Solver('heuristics', args.maxiter, boxes)),
+		('cbj, no nogoods', Solver('cbj', args.maxiter, boxes, nogoods=0)),
+		('cbj', Solver('cbj', args.maxiter, boxes, nogoods=args.nogoods, nogoodsize=args.nogoodsize)))
+	for name, solver in solvers:
+		results = [solver.solve(puzzle) for puzzle in capped]
+		print('%-16s solved %3d/%d, assignments %7d, backtracks %7d' % (name, sum(1 for result in results if result.status == SOLVED),
+			len(capped), sum(result.assignments for result in results), sum(result.backtracks for result in results)))
+	print(solvers[2][1].nogoods)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,212 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Packed Binary Corpus
+#################################
+
+# A whole puzzle corpus in one file of fixed width records, memory mapped by the loader
+# usage: python sudoku_packed.py problems.sdpk [--root problems | --input puzzles.txt]   (convert)
+#        python sudoku_packed.py problems.sdpk --info                                   (list the clue index)
+#
+# Layout (little endian):
+# header  magic 'SDPK', version (uint16), N (uint16), record count (uint32), record bytes (uint16), index entries (uint16)
+# index   one (clues, first record, record count) uint32 triple per clue count, in increasing clue order
+# records from byte RECORDALIGN on (rounded up), records sorted by clue count (stable, so corpus order within a count)
+#         4 bits per cell in row-major order, the high nibble first (N*N/2 bytes rounded up, 41 bytes for 9x9)
+# 4 bits hold values 0..15, so grids up to 9x9 (N = 4 or 9) can be packed
+
+import argparse
+import os
+import struct
+import sys
+import numpy as np
+from sudoku_solver import readpuzzle
+from sudoku_io import readpuzzles
+
+MAGIC = b'SDPK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIHH')
+INDEXENTRY = struct.Struct('<III')
+RECORDALIGN = 64
+
+### Packing ###
+# (B, N*N/2 rounded up) uint8 records of a (B, N*N) array of values
+def packvalues(values):
+	values = np.asarray(values, dtype=np.uint8)
+	if values.shape[1] % 2 == 1:
+		values = np.concatenate([values, np.zeros((len(values), 1), dtype=np.uint8)], axis=1)
+	pairs = values.reshape(len(values), -1, 2)
+	return (pairs[:, :, 0] << 4) | pairs[:, :, 1]
+
+# (B, cells) uint8 values of (B, record bytes) records, the only copy a loader makes
+def unpackvalues(records, cells):
+	records = np.asarray(records)
+	values = np.empty((len(records), records.shape[1]*2), dtype=np.uint8)
+	values[:, 0::2] = records >> 4
+	values[:, 1::2] = records & 15
+	return values[:, :cells]
+
+# raises ValueError unless N x N grids fit the packed format
+def checkpackable(size):
+	if size > 15:
+		raise ValueError('%dx%d grids do not fit 4 bits per cell' % (size, size))
+
+# write the (B, N*N) values of B puzzles of size N to path as a packed corpus
+def writepacked(path, values, size):
+	values = np.asarray(values, dtype=np.uint8).reshape(-1, size*size)
+	checkpackable(size)
+	writerecords(path, [packvalues(values)], np.count_nonzero(values, axis=1), size)
+
+# write the packed records (packvalues) of puzzles of size N with the given clue counts to path as a packed corpus
+# chunks is a list of record arrays in puzzle order. The list is emptied as they are joined, and the joined records are
+# dropped once sorted, so at most two copies of the records are held at a time
+def writerecords(path, chunks, clues, size):
+	records = np.concatenate(chunks)
+	chunks.clear()
+	order = np.argsort(clues, kind='stable')
+	records = records[order]
+	clues = clues[order]
+	bucketclues, first, counts = np.unique(clues, return_index=True, return_counts=True)
+	offset = HEADER.size + INDEXENTRY.size*len(bucketclues)
+	offset = (offset + RECORDALIGN - 1) // RECORDALIGN * RECORDALIGN
+	with open(path, 'wb') as f:
+		f.write(HEADER.pack(MAGIC, VERSION, size, len(records), (size*size + 1) // 2, len(bucketclues)))
+		for k in range(len(bucketclues)):
+			f.write(INDEXENTRY.pack(int(bucketclues[k]), int(first[k]), int(counts[k])))
+		f.write(b'\0' * (offset - f.tell()))
+		records.tofile(f)
+
+### Converters ###
+# pack a list of grids of one size into path, returns the puzzle count
+def packgrids(grids, path):
+	if len(grids) == 0:
+		raise ValueError('no puzzles to pack')
+	size = len(grids[0])
+	writepacked(path, np.array(grids, dtype=np.uint8).reshape(len(grids), size*size), size)
+	return len(grids)
+
+# pack problems/<clues>/<instance>.sd (directories and files in numeric order) into path, returns the puzzle count
+def packtree(root, path):
+	grids = []
+	for clues in sorted((name for name in os.listdir(root) if name.isdigit()), key=int):
+		directory = os.path.join(root, clues)
+		for name in sorted((name for name in os.listdir(directory) if name.endswith('.sd')), key=lambda name: int(name[:-3])):
+			grids.append(readpuzzle(os.path.join(directory, name)))
+	return packgrids(grids, path)
+
+# pack every puzzle of a sudoku_io.py stream (opened in binary mode) into path, returns the puzzle count
+# Every PACKCHUNK puzzles read are packed at once and only their records and clue counts are kept, so a million 9x9
+# puzzles are held as 41MB of records and 2MB of clue counts. Sorting them by clue count takes a second copy of the
+# records and the sort order, about 95MB at the peak
+PACKCHUNK = 4096
+
+def packstream(stream, path):
+	chunks = []
+	clues = []
+	size = 0
+	grids = []
+
+	def pack():
+		values = np.array(grids, dtype=np.uint8).reshape(len(grids), -1)
+		chunks.append(packvalues(values))
+		clues.append(np.count_nonzero(values, axis=1).astype(np.uint16))
+		grids.clear()
+
+	for kind, grid in readpuzzles(stream):
+		if size == 0:
+			size = len(grid)
+			checkpackable(size)
+		elif len(grid) != size:
+			raise ValueError('a packed corpus holds one grid size, got %dx%d after %dx%d' % (len(grid), len(grid), size, size))
+		grids.append(grid)
+		if len(grids) == PACKCHUNK:
+			pack()
+	if len(grids) > 0:
+		pack()
+	if len(chunks) == 0:
+		raise ValueError('no puzzles to pack')
+	count = sum(len(chunk) for chunk in chunks)
+	writerecords(path, chunks, np.concatenate(clues), size)
+	return count
+
+### PackedCorpus ###
+# Memory maps a packed corpus read-only: records is a (count, record bytes) uint8 view of the mapping, bucket(clues)
+# a view of the records with that clue count, neither copies anything. Pages are read from the file as they are
+# touched and the OS shares them between every process that maps the same file
+# Pickles as its path, so a PackedCorpus sent to pool workers maps the file again there instead of copying it
+class PackedCorpus:
+	def __init__(self, path):
+		self.path = path
+		self.mapping = np.memmap(path, dtype=np.uint8, mode='r')
+		magic, version, size, count, recordbytes, nindex = HEADER.unpack_from(self.mapping, 0)
+		if magic != MAGIC:
+			raise ValueError('%s is not a packed sudoku corpus' % path)
+		if version != VERSION:
+			raise ValueError('%s has packed corpus version %d, expected %d' % (path, version, VERSION))
+		self.size = size
+		self.count = count
+		self.recordbytes = recordbytes
+		# clues -> (first record, record count)
+		self.index = {}
+		for k in range(nindex):
+			clues, first, bucketcount = INDEXENTRY.unpack_from(self.mapping, HEADER.size + k*INDEXENTRY.size)
+			self.index[clues] = (first, bucketcount)
+		offset = HEADER.size + INDEXENTRY.size*nindex
+		offset = (offset + RECORDALIGN - 1) // RECORDALIGN * RECORDALIGN
+		self.records = self.mapping[offset:offset + count*recordbytes].reshape(count, recordbytes)
+
+	def __getstate__(self):
+		return self.path
+
+	def __setstate__(self, path):
+		self.__init__(path)
+
+	def __len__(self):
+		return self.count
+
+	# clue counts present, in increasing order
+	def cluecounts(self):
+		return sorted(self.index)
+
+	# records with the given clue count (empty if there are none)
+	def bucket(self, clues):
+		first, count = self.index.get(clues, (0, 0))
+		return self.records[first:first + count]
+
+	# (B, N*N) values of a slice of records (all of them by default)
+	def values(self, records=None):
+		if records is None:
+			records = self.records
+		return unpackvalues(records, self.size*self.size)
+
+	# puzzle k as N rows of N values
+	def puzzle(self, k):
+		return unpackvalues(self.records[k:k + 1], self.size*self.size).reshape(self.size, self.size).tolist()
+
+	def __getitem__(self, k):
+		return self.puzzle(k)
+
+def main():
+	parser = argparse.ArgumentParser(description='Convert puzzles to a packed corpus, or list the clue index of one')
+	parser.add_argument('path', help='packed corpus file')
+	parser.add_argument('--root', default='problems', help='problems tree to convert')
+	parser.add_argument('--input', help='puzzle file (.sd grids or 81 character lines, - for stdin) to convert instead')
+	parser.add_argument('--info', action='store_true', help='list the clue index of path instead of writing it')
+	args = parser.parse_args()
+
+	if not args.info:
+		if args.input == '-':
+			count = packstream(sys.stdin.buffer, args.path)
+		elif args.input is not None:
+			with open(args.input, 'rb') as f:
+				count = packstream(f, args.path)
+		else:
+			count = packtree(args.root, args.path)
+		print('packed %d puzzles into %s (%d bytes)' % (count, args.path, os.path.getsize(args.path)))
+	corpus = PackedCorpus(args.path)
+	print('%dx%d grids, %d puzzles, %d bytes per record' % (corpus.size, corpus.size, len(corpus), corpus.recordbytes))
+	if args.info:
+		for clues in corpus.cluecounts():
+			print('%4d clues: %d' % (clues, len(corpus.bucket(clues))))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,203 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Parallel Portfolio Solving
+#################################
+
+# Races differently configured solvers on one puzzle and keeps the first answer, cancelling the rest
+# usage: python sudoku_portfolio.py [--processes N] [--maxiter 10000] [--noboxes] [--root problems]
+#        python sudoku_portfolio.py --boxsize 4 --puzzles 20 [--holes 0.6]   (random puzzles of sudoku_scaling.py)
+#
+# A single solver's cost over a corpus is heavy tailed: most puzzles take a few dozen assignments, a few run into the
+# iteration cap (e.g. heuristics at positions 35, 54 and 100 of plotheuristicscounter in results.txt). Which puzzles
+# are hard depends on the variable and value order, so solvers with other orders, random tie-breaking and restarts are
+# unlikely to all get stuck on the same puzzle. Racing them trades the throughput of the extra solvers for the tail
+# A config is (variant, options) with options the keyword arguments of Solver besides variant/maxiter/boxes
+
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import time
+from sudoku_solver import Solver, CancelToken, SOLVED, UNSATISFIABLE, readpuzzle
+from sudoku_runner import corpusjobs
+from sudoku_benchmark import percentile
+from sudoku_scaling import randompuzzle
+
+# the default portfolio: the three searches with different variable orders as they are, then propagate with the other
+# value orders, random tie-breaking and luby restarts
+PORTFOLIO = (
+	('heuristics', {}),
+	('propagate', {}),
+	('dlx', {}),
+	('propagate', {'valueorder': 'high'}),
+	('propagate', {'valueorder': 'random', 'seed': 1, 'restartunit': 32}),
+	('propagate', {'seed': 2, 'restartunit': 32}),
+)
+
+# short text of a config, e.g. propagate(valueorder=random, seed=1, restartunit=32)
+def configname(config):
+	variant, options = config
+	if len(options) == 0:
+		return variant
+	return '%s(%s)' % (variant, ', '.join('%s=%s' % (name, value) for name, value in options.items()))
+
+### Workers ###
+# Every pool worker holds one Solver per config and the CancelToken of the shared Event, both set up by the pool
+# initializer (a multiprocessing Event can only reach the workers by inheritance, not as a task argument)
+workersolvers = []
+workertoken = None
+
+def initworker(event, configs, maxiter, boxes):
+	global workertoken
+	workertoken = CancelToken(event)
+	for variant, options in configs:
+		workersolvers.append(Solver(variant, maxiter, boxes, **options))
+
+# solve puzzle with config index in a worker, returns (index, SolveResult)
+def runconfig(index, puzzle, timeout):
+	return index, workersolvers[index].solve(puzzle, timeout, cancel=workertoken)
+
+### Portfolio ###
+# solve(puzzle) races every config on puzzle and returns (result, config) of the first solve to finish solved or
+# unsatisfiable. The other solves are cancelled as it returns; if none of them gets an answer (every one ran out of
+# iterations or time) the last to stop is returned, with status budget exhausted
+# processes: worker processes the configs run in (one per config up to the number of cores by default, none on a
+# single core). Configs beyond the number of processes wait for a free worker. 0 runs them all in this process
+# instead, taking turns of at most CHECKEVERY iterations each (Solver.solvesteps), which cuts the tail on one core too
+class Portfolio:
+	def __init__(self, configs=PORTFOLIO, processes=None, maxiter=10000, boxes=True):
+		self.configs = list(configs)
+		if processes is None:
+			processes = min(len(self.configs), os.cpu_count() or 1)
+			if processes == 1:
+				processes = 0
+		self.processes = processes
+		self.solvers = None
+		self.pool = None
+		if processes == 0:
+			self.solvers = [Solver(variant, maxiter, boxes, **options) for variant, options in self.configs]
+		else:
+			self.event = multiprocessing.Event()
+			self.pool = multiprocessing.Pool(processes, initworker, (self.event, self.configs, maxiter, boxes))
+		# solves of the last race still winding down, waited for before the next race clears the event
+		self.pending = []
+		# wins[k] is the number of races config k won
+		self.wins = [0] * len(self.configs)
+
+	def solve(self, puzzle, timeout=None):
+		if self.pool is None:
+			index, result = self.interleave(puzzle, timeout)
+		else:
+			index, result = self.race(puzzle, timeout)
+		if result.status == SOLVED or result.status == UNSATISFIABLE:
+			self.wins[index] += 1
+		return result, self.configs[index]
+
+	def race(self, puzzle, timeout):
+		for pending in self.pending:
+			pending.wait()
+		self.event.clear()
+		done = queue.Queue()
+		self.pending = [self.pool.apply_async(runconfig, (index, puzzle, timeout), callback=done.put,
+			error_callback=done.put) for index in range(len(self.configs))]
+		last = None
+		for k in range(len(self.configs)):
+			outcome = done.get()
+			if isinstance(outcome, BaseException):
+				self.event.set()
+				raise outcome
+			index, result = outcome
+			if result.status == SOLVED or result.status == UNSATISFIABLE:
+				self.event.set()
+				return index, result
+			last = outcome
+		return last
+
+	def interleave(self, puzzle, timeout):
+		token = CancelToken()
+		running = [(index, self.solvers[index].solvesteps(puzzle, timeout, cancel=token)) for index in range(len(self.configs))]
+		last = None
+		while len(running) > 0:
+			stillrunning = []
+			for index, steps in running:
+				try:
+					next(steps)
+				except StopIteration as stop:
+					result = stop.value
+					if result.status == SOLVED or result.status == UNSATISFIABLE:
+						# the others see the token on their next step and unwind (putting the dlx links back)
+						token.cancel()
+						for otherindex, othersteps in running:
+							if othersteps is not steps:
+								for step in othersteps:
+									pass
+						return index, result
+					last = (index, result)
+				else:
+					stillrunning.append((index, steps))
+			running = stillrunning
+		return last
+
+	def close(self):
+		if self.pool is not None:
+			self.event.set()
+			self.pool.terminate()
+			self.pool.join()
+			self.pool = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+### Tail benchmark ###
+# Wall time of every puzzle solved by the first config alone and by the portfolio, as latency percentiles
+def latencies(solve, puzzles):
+	times = []
+	answered = 0
+	for puzzle in puzzles:
+		start = time.perf_counter()
+		result = solve(puzzle)
+		times.append(time.perf_counter() - start)
+		if result.status == SOLVED or result.status == UNSATISFIABLE:
+			answered += 1
+	return sorted(times), answered
+
+def report(name, times, answered):
+	print('%-26s answered %4d/%d  mean %8.2fms  p50 %8.2fms  p90 %8.2fms  p99 %8.2fms  max %8.2fms' % (name, answered,
+		len(times), sum(times)*1e3 / len(times), percentile(times, 50)*1e3, percentile(times, 90)*1e3,
+		percentile(times, 99)*1e3, times[-1]*1e3))
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare the latency tail of a single solver and a racing portfolio')
+	parser.add_argument('--processes', type=int, default=None, help='portfolio worker processes, 0 to interleave in one process')
+	parser.add_argument('--maxiter', type=int, default=10000)
+	parser.add_argument('--timeout', type=float, default=None, help='seconds allowed per solve')
+	parser.add_argument('--noboxes', action='store_true', help='row/column constraints only, as in results.txt')
+	parser.add_argument('--root', default='problems')
+	parser.add_argument('--boxsize', type=int, default=0, help='solve random puzzles of this box size instead of the corpus')
+	parser.add_argument('--puzzles', type=int, default=20, help='random puzzles to solve')
+	parser.add_argument('--holes', type=float, default=0.6, help='fraction of the cells of a random puzzle left empty')
+	args = parser.parse_args()
+
+	if args.boxsize > 0:
+		rng = random.Random(1)
+		puzzles = [randompuzzle(args.boxsize, args.holes, rng) for k in range(args.puzzles)]
+	else:
+		puzzles = [readpuzzle(job[1]) for job in corpusjobs(['heuristics'], args.root)]
+	boxes = not args.noboxes
+	for config in PORTFOLIO[:2]:
+		variant, options = config
+		solver = Solver(variant, args.maxiter, boxes, timeout=args.timeout, **options)
+		times, answered = latencies(solver.solve, puzzles)
+		report(configname(config) + ' alone', times, answered)
+	with Portfolio(PORTFOLIO, args.processes, args.maxiter, boxes) as portfolio:
+		times, answered = latencies(lambda puzzle: portfolio.solve(puzzle, args.timeout)[0], puzzles)
+		report('portfolio of %d (%d proc)' % (len(PORTFOLIO), portfolio.processes), times, answered)
+		for k in range(len(PORTFOLIO)):
+			print('  %5d wins  %s' % (portfolio.wins[k], configname(PORTFOLIO[k])))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,136 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Multi-core Corpus Runner
+#################################
+
+# Runs (puzzle, solver variant) jobs over a pool of worker processes
+# usage: python sudoku_runner.py [--variants basic fwdcheck ...] [--processes N] [--root problems | --packed problems.sdpk]
+
+import argparse
+import multiprocessing
+import os
+import time
+from sudoku_solver import Solver, VARIANTS, SOLVED, readpuzzle
+
+# Solvers of the current worker process, one per (variant, maxiter, boxes), created on first use and kept for later jobs
+workersolvers = {}
+
+# Packed corpora mapped by the current worker process, by path
+workercorpora = {}
+
+### Jobs ###
+# A job is (index, path, variant): index is the position of the result in the ordered output, path the .sd file
+# or (packed corpus path, record) for a puzzle of a sudoku_packed.py corpus
+# Workers read the puzzle themselves so only the path is sent to them and only the counters come back
+
+# jobs for problems/<clues>/<instance>.sd, in the order of sudoku_plot.py: by clue count, then instance, then variant
+def corpusjobs(variants, root='problems', clues=range(1,72), instances=range(1,11)):
+	index = 0
+	for givennumbers in clues:
+		for instance in instances:
+			path = os.path.join(root, str(givennumbers), str(instance) + '.sd')
+			for variant in variants:
+				yield (index, path, variant)
+				index += 1
+
+# jobs for every record of a packed corpus, in record order (clue count, then the order the records were packed in)
+# (sudoku_packed needs numpy, so it is only imported on the packed paths)
+def packedjobs(variants, path):
+	from sudoku_packed import PackedCorpus
+	index = 0
+	for record in range(len(PackedCorpus(path))):
+		for variant in variants:
+			yield (index, (path, record), variant)
+			index += 1
+
+# puzzle of a job path, the corpus file of a packed job is mapped once per worker and shared by its later jobs
+def jobpuzzle(path):
+	if isinstance(path, tuple):
+		corpuspath, record = path
+		if corpuspath not in workercorpora:
+			from sudoku_packed import PackedCorpus
+			workercorpora[corpuspath] = PackedCorpus(corpuspath)
+		return workercorpora[corpuspath].puzzle(record)
+	return readpuzzle(path)
+
+# solve one job in the worker, returns a dict with the job fields, the clue count, the SolveResult counters and the wall
+# and CPU seconds of the solve (plus the solution grid if withsolution is set)
+def runjob(job, maxiter=10000, withsolution=False, boxes=True):
+	index, path, variant = job
+	key = (variant, maxiter, boxes)
+	if key not in workersolvers:
+		workersolvers[key] = Solver(variant, maxiter, boxes)
+	puzzle = jobpuzzle(path)
+	wallstart = time.perf_counter()
+	cpustart = time.process_time()
+	result = workersolvers[key].solve(puzzle)
+	cpu = time.process_time() - cpustart
+	wall = time.perf_counter() - wallstart
+	record = {'index': index, 'path': path, 'variant': variant, 'clues': sum(1 for row in puzzle for value in row if value != 0),
+		'status': result.status, 'assignments': result.assignments, 'backtracks': result.backtracks, 'wall': wall, 'cpu': cpu}
+	if withsolution:
+		record['solution'] = result.solution
+	return record
+
+# picklable job runner bound to the run options (a lambda can't be sent to the workers)
+class JobRunner:
+	def __init__(self, maxiter, withsolution, boxes=True):
+		self.maxiter = maxiter
+		self.withsolution = withsolution
+		self.boxes = boxes
+
+	def __call__(self, job):
+		return runjob(job, self.maxiter, self.withsolution, self.boxes)
+
+### runcorpus ###
+# Generator over the results of jobs (any iterable, consumed lazily) as workers finish them, in completion order
+# processes defaults to the number of cores, processes=1 runs in this process without a pool
+# chunksize jobs are sent to a worker at a time, which keeps the per-job IPC overhead low on large corpora
+def runcorpus(jobs, processes=None, maxiter=10000, withsolution=False, chunksize=16, boxes=True):
+	runner = JobRunner(maxiter, withsolution, boxes)
+	if processes is None:
+		processes = os.cpu_count() or 1
+	if processes == 1:
+		for job in jobs:
+			yield runner(job)
+		return
+	with multiprocessing.Pool(processes) as pool:
+		for record in pool.imap_unordered(runner, jobs, chunksize):
+			yield record
+
+# put results back in job order: yields each record as soon as every record before it has arrived, so only the
+# records that finished out of order are held in memory (job indices must be 0, 1, 2, ... as corpusjobs makes them)
+def ordered(results):
+	pending = {}
+	nextindex = 0
+	for record in results:
+		pending[record['index']] = record
+		while nextindex in pending:
+			yield pending.pop(nextindex)
+			nextindex += 1
+
+def main():
+	parser = argparse.ArgumentParser(description='Run solver variants over the problems corpus on all cores')
+	parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=VARIANTS)
+	parser.add_argument('--processes', type=int, default=None)
+	parser.add_argument('--root', default='problems')
+	parser.add_argument('--packed', help='packed corpus (sudoku_packed.py) to run instead of the problems tree')
+	parser.add_argument('--maxiter', type=int, default=10000)
+	args = parser.parse_args()
+
+	start = time.perf_counter()
+	if args.packed is not None:
+		jobs = packedjobs(args.variants, args.packed)
+	else:
+		jobs = corpusjobs(args.variants, args.root)
+	records = list(ordered(runcorpus(jobs, args.processes, args.maxiter)))
+	elapsed = time.perf_counter() - start
+	for variant in args.variants:
+		mine = [record for record in records if record['variant'] == variant]
+		solved = sum(1 for record in mine if record['status'] == SOLVED)
+		print('%-11s solved %d/%d, assignments %d, backtracks %d' % (variant, solved, len(mine),
+			sum(record['assignments'] for record in mine), sum(record['backtracks'] for record in mine)))
+	print('%d jobs in %.2fs' % (len(records), elapsed))
+
+if __name__ == '__main__':
+	main()
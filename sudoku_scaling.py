@@ -0,0 +1,79 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Scaling Benchmark
+#################################
+
+# Solve random N x N puzzles for growing box sizes (N = boxsize*boxsize) and report solve time and variable assignments
+# usage: python sudoku_scaling.py [--boxsizes 2 3 4 5 6] [--variants fwdcheck heuristics propagate] [--puzzles 5] [--holes 0.35]
+
+import argparse
+import random
+import time
+from sudoku_solver import Solver, SOLVED
+
+### Puzzle generation ###
+# Random valid solution: the standard pattern grid shuffled by digit relabeling, row/column swaps within bands/stacks
+# and band/stack swaps (all of which keep every row, column and box valid)
+def randomsolution(boxsize, rng):
+	size = boxsize*boxsize
+	digits = list(range(1, size+1))
+	rng.shuffle(digits)
+	bands = list(range(boxsize))
+	rng.shuffle(bands)
+	rows = []
+	for band in bands:
+		inband = list(range(boxsize))
+		rng.shuffle(inband)
+		rows += [band*boxsize + r for r in inband]
+	stacks = list(range(boxsize))
+	rng.shuffle(stacks)
+	cols = []
+	for stack in stacks:
+		instack = list(range(boxsize))
+		rng.shuffle(instack)
+		cols += [stack*boxsize + c for c in instack]
+	return [[digits[(boxsize*(r % boxsize) + r//boxsize + c) % size] for c in cols] for r in rows]
+
+# Blank out a fraction holes of the cells of a random solution (puzzle is always solvable, not necessarily unique)
+def randompuzzle(boxsize, holes, rng):
+	puzzle = randomsolution(boxsize, rng)
+	size = boxsize*boxsize
+	cells = list(range(size*size))
+	rng.shuffle(cells)
+	for i in cells[:int(holes*size*size)]:
+		puzzle[i // size][i % size] = 0
+	return puzzle
+
+def main():
+	parser = argparse.ArgumentParser(description='Solve time and variable assignments as the grid size grows')
+	parser.add_argument('--boxsizes', type=int, nargs='+', default=[2, 3, 4, 5, 6])
+	parser.add_argument('--variants', nargs='+', default=['fwdcheck', 'heuristics', 'propagate'])
+	parser.add_argument('--puzzles', type=int, default=5, help='puzzles per box size')
+	parser.add_argument('--holes', type=float, default=0.35, help='fraction of cells left unassigned')
+	parser.add_argument('--maxiter', type=int, default=200000)
+	parser.add_argument('--seed', type=int, default=1)
+	args = parser.parse_args()
+
+	print('%-6s %-11s %8s %12s %12s %12s' % ('grid', 'variant', 'solved', 'mean time', 'max time', 'mean assign'))
+	for boxsize in args.boxsizes:
+		size = boxsize*boxsize
+		# same puzzles for every variant
+		rng = random.Random(args.seed*1000 + boxsize)
+		puzzles = [randompuzzle(boxsize, args.holes, rng) for i in range(args.puzzles)]
+		for variant in args.variants:
+			solver = Solver(variant, args.maxiter)
+			times = []
+			assignments = []
+			solved = 0
+			for puzzle in puzzles:
+				start = time.perf_counter()
+				result = solver.solve(puzzle)
+				times.append(time.perf_counter() - start)
+				assignments.append(result.assignments)
+				if result.status == SOLVED:
+					solved += 1
+			print('%-6s %-11s %4d/%-3d %11.4fs %11.4fs %12.1f' % ('%dx%d' % (size, size), variant, solved, len(puzzles),
+				sum(times)/len(times), max(times), sum(assignments)/len(assignments)))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,546 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Local HTTP/JSON Solving Service
+#################################
+
+# Solves puzzles sent over HTTP/JSON on localhost with a pool of warm worker processes
+# usage: python sudoku_server.py [--port 8642] [--processes N] [--maxbatch 64] [--window 0] [--jobtimeout 60]   (serve)
+#        python sudoku_server.py --benchmark [--count 200] [--variant propagate] [--clients 4]  (measure the overhead)
+#
+# POST /solve   {"puzzle": P, "variant": "heuristics", "maxiter": 10000, "timeout": null, "nodes": null}
+#               -> {"status": ..., "solution": N rows or null, "assignments": n, "backtracks": n, "elapsed": seconds}
+#               {"puzzles": [P, ...], same options} -> {"results": [one result per puzzle, in order]}
+#               P is N rows of N values (0 for unassigned) or a 16/81 character line with '0' or '.' for unassigned
+#               variant is one of VARIANTS or 'batch' (sudoku_batch.py propagation, then propagate search)
+# GET  /health  -> {"processes": N, "batches": n, "puzzles": n} (batches sent to the workers, puzzles solved)
+# Malformed requests get status 400 and {"error": message} (413 for a body over MAXBODY bytes). A puzzle whose solve
+# fails in a worker (or whose worker does not answer within jobtimeout seconds per puzzle of its batch) gets
+# {"status": "error", "error": message} in a batch request's results and status 500 in a single puzzle request
+#
+# The workers import the solver and NumPy (when installed) and solve a puzzle with every variant before the server
+# accepts requests, so the first request pays no import or table building. Puzzles are queued one by one (a batch
+# request adds all of its puzzles) and one dispatcher thread sends them to the workers: it waits for a free worker and
+# then takes every puzzle queued by then (up to maxbatch) as one task, so requests that arrive while the workers are
+# busy share one round trip to a worker. window > 0 also waits that many seconds for more puzzles before sending a
+# small batch
+
+import argparse
+import http.client
+import io
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from sudoku_solver import Solver, VARIANTS, SOLVED, readpuzzle
+from sudoku_io import readpuzzles
+from sudoku_runner import corpusjobs
+
+PORT = 8642
+
+# seconds the workers get to warm up before the server gives up
+WARMSECONDS = 120
+
+# largest request body read, in bytes
+MAXBODY = 16 << 20
+
+# status of the result dict of a job that failed in a worker
+ERROR = 'error'
+
+# solved by every variant in each worker before it takes requests (puzzle_needs_heuristics.sd)
+WARMPUZZLE = '000000000000000008000000007000000006000000005000000004000000003000000002010000000'
+
+### Workers ###
+# A job is (puzzle, variant, maxiter, timeout, nodes), a worker task a list of jobs, its result one dict per job
+
+# Solvers of the current worker process, one per variant, created on first use and kept for later jobs (a job's maxiter
+# is passed to solve as its node budget)
+workersolvers = {}
+
+# pool initializer: build the solvers and tables the requests will need (and import numpy for the batch variant, when
+# it is installed), then release ready (a Semaphore the server acquires once per worker) so the server only starts
+# once every worker is warm. A worker the pool starts later to replace a dead one releases it too, without blocking
+# A warm-up that fails puts its error on failed instead (and the worker stays up, so the pool does not keep replacing
+# it) for the server to stop with. The server process itself never loads numpy
+def warmworker(ready, failed):
+	try:
+		puzzle = list(readpuzzles(io.BytesIO(WARMPUZZLE.encode())))[0][1]
+		for variant in VARIANTS:
+			workersolver(variant).solve(puzzle)
+		try:
+			from sudoku_batch import solvebatch
+		except ImportError:
+			# numpy is optional, batch requests then get an error result from solvejobs
+			pass
+		else:
+			solvebatch([puzzle])
+	except Exception as error:
+		if failed is None:
+			raise
+		failed.put('%s: %s' % (type(error).__name__, error))
+		return
+	if ready is not None:
+		ready.release()
+
+def workersolver(variant):
+	if variant not in workersolvers:
+		workersolvers[variant] = Solver(variant)
+	return workersolvers[variant]
+
+def resultrecord(result):
+	return {'status': result.status, 'solution': result.solution, 'assignments': result.assignments,
+		'backtracks': result.backtracks, 'elapsed': result.elapsed}
+
+def errorrecord(error):
+	return {'status': ERROR, 'error': '%s: %s' % (type(error).__name__, error)}
+
+# solve a worker task, the batch variant jobs of one grid size and limits go through solvebatch together
+# A job that raises gets an error record and the other jobs of the task are still solved
+def solvejobs(jobs):
+	records = [None] * len(jobs)
+	batches = {}
+	for k in range(len(jobs)):
+		puzzle, variant, maxiter, timeout, nodes = jobs[k]
+		if nodes is None:
+			nodes = maxiter
+		if variant == 'batch':
+			batches.setdefault((len(puzzle), timeout, nodes), []).append(k)
+			continue
+		try:
+			records[k] = resultrecord(workersolver(variant).solve(puzzle, timeout, nodes))
+		except Exception as error:
+			records[k] = errorrecord(error)
+	for (size, timeout, nodes), indices in batches.items():
+		start = time.perf_counter()
+		try:
+			from sudoku_batch import solvebatch
+			results = solvebatch([jobs[k][0] for k in indices], timeout=timeout, nodes=nodes)
+		except Exception:
+			# solve them one by one so only the puzzle that fails gets the error
+			for k in indices:
+				start = time.perf_counter()
+				try:
+					from sudoku_batch import solvebatch
+					result = solvebatch([jobs[k][0]], timeout=timeout, nodes=nodes)[0]
+				except Exception as error:
+					records[k] = errorrecord(error)
+				else:
+					result.elapsed = time.perf_counter() - start
+					records[k] = resultrecord(result)
+			continue
+		# the batch time is shared out evenly, solvebatch does not time single puzzles
+		elapsed = (time.perf_counter() - start) / len(indices)
+		for k, result in zip(indices, results):
+			result.elapsed = elapsed
+			records[k] = resultrecord(result)
+	return records
+
+### Requests ###
+# puzzle of a request as N rows of N values, raises ValueError if it is not a valid grid
+def requestpuzzle(value):
+	if isinstance(value, str):
+		records = list(readpuzzles(io.BytesIO(value.encode())))
+		if len(records) != 1:
+			raise ValueError('puzzle string holds %d puzzles, expected 1' % len(records))
+		# a grid string can still have any number of rows or values beyond N, so it is checked as a list below
+		value = records[0][1]
+	if not isinstance(value, list) or len(value) == 0:
+		raise ValueError('puzzle must be a list of rows or a line string')
+	size = len(value)
+	boxsize = int(round(size ** 0.5))
+	if boxsize*boxsize != size:
+		raise ValueError('puzzle has %d rows, expected a square number (4, 9, 16, 25, ...)' % size)
+	for row in value:
+		if not isinstance(row, list) or len(row) != size:
+			raise ValueError('puzzle rows must be lists of %d values' % size)
+		for cell in row:
+			if not isinstance(cell, int) or isinstance(cell, bool) or cell < 0 or cell > size:
+				raise ValueError('puzzle values must be integers from 0 to %d, got %r' % (size, cell))
+	return value
+
+# worker jobs of a /solve request body, and whether it asked for one puzzle or a list
+def requestjobs(body):
+	if not isinstance(body, dict):
+		raise ValueError('request must be a JSON object')
+	variant = body.get('variant', 'heuristics')
+	if variant not in VARIANTS and variant != 'batch':
+		raise ValueError('unknown variant %r, expected one of %s' % (variant, ', '.join(VARIANTS + ('batch',))))
+	maxiter = body.get('maxiter', 10000)
+	nodes = body.get('nodes')
+	timeout = body.get('timeout')
+	for name, value in (('maxiter', maxiter), ('nodes', nodes)):
+		if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+			raise ValueError('%s must be a positive integer' % name)
+	if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout <= 0):
+		raise ValueError('timeout must be a positive number of seconds')
+	if 'puzzles' in body:
+		if not isinstance(body['puzzles'], list):
+			raise ValueError('puzzles must be a list')
+		puzzles = [requestpuzzle(value) for value in body['puzzles']]
+		single = False
+	elif 'puzzle' in body:
+		puzzles = [requestpuzzle(body['puzzle'])]
+		single = True
+	else:
+		raise ValueError('request needs a puzzle or puzzles')
+	return [(puzzle, variant, maxiter, timeout, nodes) for puzzle in puzzles], single
+
+### Coalescer ###
+# Queues jobs and sends them to the pool in batches (see the top of the file), submit returns a Future of the job's
+# result dict. With no pool (processes=0) the dispatcher thread solves the batches itself
+# A batch the pool has not answered jobtimeout seconds per job after it was sent (its worker died, or is stuck) fails
+# with TimeoutError and frees its slot, so no request waits forever
+class Coalescer:
+	def __init__(self, pool, processes, maxbatch=64, window=0.0, jobtimeout=60.0):
+		self.pool = pool
+		self.maxbatch = maxbatch
+		self.window = window
+		self.jobtimeout = jobtimeout
+		self.queue = queue.Queue()
+		# one slot per worker, a batch is only sent to a free worker so the queue fills up while they are busy
+		self.slots = threading.Semaphore(max(processes, 1))
+		self.batches = 0
+		self.puzzles = 0
+		self.thread = threading.Thread(target=self.run, daemon=True)
+		self.thread.start()
+
+	def submit(self, job):
+		future = Future()
+		self.queue.put((job, future))
+		return future
+
+	def close(self):
+		self.queue.put(None)
+		self.thread.join()
+
+	def run(self):
+		while True:
+			item = self.queue.get()
+			if item is None:
+				return
+			self.slots.acquire()
+			batch = [item]
+			stop = False
+			deadline = time.perf_counter() + self.window
+			while len(batch) < self.maxbatch:
+				try:
+					wait = deadline - time.perf_counter()
+					if wait > 0:
+						item = self.queue.get(timeout=wait)
+					else:
+						item = self.queue.get_nowait()
+				except queue.Empty:
+					break
+				if item is None:
+					stop = True
+					break
+				batch.append(item)
+			self.dispatch(batch)
+			if stop:
+				return
+
+	def dispatch(self, batch):
+		self.batches += 1
+		jobs = [job for job, future in batch]
+		futures = [future for job, future in batch]
+		# the first of done, failed and the timer to run frees the slot and settles the futures, the others do nothing
+		lock = threading.Lock()
+		settled = []
+
+		def settle():
+			with lock:
+				if settled:
+					return False
+				settled.append(True)
+			timer.cancel()
+			self.slots.release()
+			return True
+
+		def done(records):
+			if settle():
+				self.puzzles += len(records)
+				for future, record in zip(futures, records):
+					future.set_result(record)
+
+		def failed(error):
+			if settle():
+				for future in futures:
+					future.set_exception(error)
+
+		def expired():
+			failed(TimeoutError('no result from the worker after %.0f seconds' % (self.jobtimeout*len(jobs))))
+
+		timer = threading.Timer(self.jobtimeout*len(jobs), expired)
+		timer.daemon = True
+		if self.pool is None:
+			try:
+				records = solvejobs(jobs)
+			except Exception as error:
+				failed(error)
+			else:
+				done(records)
+		else:
+			timer.start()
+			try:
+				self.pool.apply_async(solvejobs, (jobs,), callback=done, error_callback=failed)
+			except Exception as error:
+				failed(error)
+
+### SolveServer ###
+# The HTTP server, the coalescer and the warm pool (processes workers, one per core by default, 0 to solve in the
+# server process). The constructor returns once the workers are warm and the port is bound, serveforever serves
+# requests until close is called from another thread
+class SolveServer:
+	def __init__(self, host='127.0.0.1', port=PORT, processes=None, maxbatch=64, window=0.0, verbose=False,
+			jobtimeout=60.0):
+		if processes is None:
+			processes = os.cpu_count() or 1
+		self.processes = processes
+		self.pool = None
+		if processes > 0:
+			ready = multiprocessing.Semaphore(0)
+			failed = multiprocessing.Queue()
+			self.pool = multiprocessing.Pool(processes, warmworker, (ready, failed))
+			try:
+				self.waitwarm(ready, failed, processes, WARMSECONDS)
+			except RuntimeError:
+				self.pool.terminate()
+				self.pool.join()
+				raise
+		else:
+			warmworker(None, None)
+		self.coalescer = Coalescer(self.pool, processes, maxbatch, window, jobtimeout)
+		self.httpserver = ThreadingHTTPServer((host, port), RequestHandler)
+		self.httpserver.daemon_threads = True
+		self.httpserver.solveserver = self
+		self.verbose = verbose
+		self.address = self.httpserver.server_address
+
+	# wait until processes workers released ready, raises RuntimeError as soon as one puts a warm-up error on failed or
+	# once timeout seconds have passed
+	def waitwarm(self, ready, failed, processes, timeout):
+		deadline = time.perf_counter() + timeout
+		warm = 0
+		while warm < processes:
+			if not failed.empty():
+				raise RuntimeError('worker failed to warm up: %s' % failed.get())
+			left = deadline - time.perf_counter()
+			if left <= 0:
+				raise RuntimeError('%d of %d workers warm after %.0f seconds' % (warm, processes, timeout))
+			if ready.acquire(timeout=min(left, 0.1)):
+				warm += 1
+
+	def serveforever(self):
+		self.httpserver.serve_forever()
+
+	def close(self):
+		self.httpserver.shutdown()
+		self.httpserver.server_close()
+		self.coalescer.close()
+		if self.pool is not None:
+			self.pool.terminate()
+			self.pool.join()
+
+	# result dicts of the jobs of one request, in order (an error record for a job whose batch failed)
+	def solvejobs(self, jobs):
+		futures = [self.coalescer.submit(job) for job in jobs]
+		records = []
+		for future in futures:
+			try:
+				records.append(future.result())
+			except Exception as error:
+				records.append(errorrecord(error))
+		return records
+
+class RequestHandler(BaseHTTPRequestHandler):
+	# keep-alive, so a client can send many requests over one connection
+	protocol_version = 'HTTP/1.1'
+	# the headers and the body go out in two writes, without TCP_NODELAY the body waits for the client's delayed ack
+	disable_nagle_algorithm = True
+
+	def reply(self, code, body):
+		data = json.dumps(body).encode()
+		self.send_response(code)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+	def do_GET(self):
+		solveserver = self.server.solveserver
+		if self.path == '/health':
+			self.reply(200, {'processes': solveserver.processes, 'batches': solveserver.coalescer.batches,
+				'puzzles': solveserver.coalescer.puzzles})
+		else:
+			self.reply(404, {'error': 'no such path %s' % self.path})
+
+	def do_POST(self):
+		try:
+			length = int(self.headers['Content-Length'])
+			if length < 0:
+				raise ValueError
+		except (TypeError, ValueError):
+			# the body is left unread, so the connection can not be used for another request
+			self.close_connection = True
+			self.reply(400, {'error': 'request needs a Content-Length header with the body size in bytes'})
+			return
+		if length > MAXBODY:
+			self.close_connection = True
+			self.reply(413, {'error': 'request body of %d bytes, at most %d accepted' % (length, MAXBODY)})
+			return
+		data = self.rfile.read(length)
+		if self.path != '/solve':
+			self.reply(404, {'error': 'no such path %s' % self.path})
+			return
+		try:
+			jobs, single = requestjobs(json.loads(data))
+		except ValueError as error:
+			# json.JSONDecodeError is a ValueError too
+			self.reply(400, {'error': str(error)})
+			return
+		records = self.server.solveserver.solvejobs(jobs)
+		if single:
+			if records[0]['status'] == ERROR:
+				self.reply(500, {'error': records[0]['error']})
+			else:
+				self.reply(200, records[0])
+		else:
+			self.reply(200, {'results': records})
+
+	def log_message(self, format, *args):
+		if self.server.solveserver.verbose:
+			BaseHTTPRequestHandler.log_message(self, format, *args)
+
+### SolveClient ###
+# Client of a SolveServer over one keep-alive connection (use one client per thread)
+# solve returns the result dict of one puzzle, solvemany the list of result dicts of many puzzles in one request
+# Raises ValueError with the server's message if the server rejects the request
+class SolveClient:
+	def __init__(self, host='127.0.0.1', port=PORT):
+		self.connection = http.client.HTTPConnection(host, port)
+
+	def request(self, body):
+		self.connection.request('POST', '/solve', json.dumps(body), {'Content-Type': 'application/json'})
+		response = self.connection.getresponse()
+		reply = json.loads(response.read())
+		if response.status != 200:
+			raise ValueError(reply['error'])
+		return reply
+
+	def solve(self, puzzle, variant='heuristics', maxiter=10000, timeout=None, nodes=None):
+		return self.request({'puzzle': puzzle, 'variant': variant, 'maxiter': maxiter, 'timeout': timeout, 'nodes': nodes})
+
+	def solvemany(self, puzzles, variant='heuristics', maxiter=10000, timeout=None, nodes=None):
+		return self.request({'puzzles': puzzles, 'variant': variant, 'maxiter': maxiter, 'timeout': timeout,
+			'nodes': nodes})['results']
+
+	def health(self):
+		self.connection.request('GET', '/health')
+		return json.loads(self.connection.getresponse().read())
+
+	def close(self):
+		self.connection.close()
+
+### Benchmark ###
+# Startup time of the server, then the time per puzzle of count corpus puzzles solved: directly by a Solver in this
+# process, one request at a time, as one batch request, and one request at a time from clients threads at once
+# (where the coalescer batches them). The clients run in this process too, so they share its cores with the server
+def benchmark(count, variant, processes, clients, maxbatch, window):
+	puzzles = [readpuzzle(job[1]) for job in corpusjobs(['heuristics'])][:count]
+	count = len(puzzles)
+	solver = Solver(variant)
+	solver.solve(puzzles[0])
+	start = time.perf_counter()
+	direct = [solver.solve(puzzle) for puzzle in puzzles]
+	directtime = (time.perf_counter() - start) / count
+	print('direct       %8.1fus per puzzle (Solver.solve in this process)' % (directtime*1e6))
+
+	start = time.perf_counter()
+	server = SolveServer('127.0.0.1', 0, processes, maxbatch, window)
+	thread = threading.Thread(target=server.serveforever, daemon=True)
+	thread.start()
+	host, port = server.address
+	client = SolveClient(host, port)
+	client.solve(puzzles[0], variant)
+	print('startup      %8.1fms to the first response (%d warm workers)' % ((time.perf_counter() - start)*1e3, processes))
+
+	try:
+		start = time.perf_counter()
+		single = [client.solve(puzzle, variant) for puzzle in puzzles]
+		singletime = (time.perf_counter() - start) / count
+		print('one by one   %8.1fus per puzzle, %+.1fus per request over direct' % (singletime*1e6,
+			(singletime - directtime)*1e6))
+
+		start = time.perf_counter()
+		many = client.solvemany(puzzles, variant)
+		batchtime = (time.perf_counter() - start) / count
+		print('one request  %8.1fus per puzzle, %+.1fus per puzzle over direct' % (batchtime*1e6,
+			(batchtime - directtime)*1e6))
+
+		before = client.health()
+		concurrent = [None] * count
+
+		def run(first):
+			threadclient = SolveClient(host, port)
+			for k in range(first, count, clients):
+				concurrent[k] = threadclient.solve(puzzles[k], variant)
+			threadclient.close()
+
+		start = time.perf_counter()
+		threads = [threading.Thread(target=run, args=(first,)) for first in range(clients)]
+		for clientthread in threads:
+			clientthread.start()
+		for clientthread in threads:
+			clientthread.join()
+		concurrenttime = (time.perf_counter() - start) / count
+		after = client.health()
+		batches = after['batches'] - before['batches']
+		print('%d clients    %8.1fus per puzzle, %d batches of %.1f puzzles on average' % (clients, concurrenttime*1e6,
+			batches, count / max(batches, 1)))
+
+		for results in (single, many, concurrent):
+			for result, expected in zip(results, direct):
+				if result['status'] != expected.status or result['solution'] != expected.solution:
+					raise RuntimeError('server result differs from the direct solve')
+		print('%d puzzles, %s solved, every server result matches the direct solve' % (count,
+			sum(1 for result in direct if result.status == SOLVED)))
+	finally:
+		client.close()
+		server.close()
+
+def main():
+	parser = argparse.ArgumentParser(description='Serve puzzle solving over HTTP/JSON on localhost')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=PORT)
+	parser.add_argument('--processes', type=int, default=None, help='worker processes (one per core by default, 0 for none)')
+	parser.add_argument('--maxbatch', type=int, default=64, help='most puzzles sent to a worker at once')
+	parser.add_argument('--window', type=float, default=0.0, help='seconds to wait for more puzzles before sending a batch')
+	parser.add_argument('--jobtimeout', type=float, default=60.0,
+		help='seconds per puzzle to wait for a worker before failing its batch')
+	parser.add_argument('--verbose', action='store_true', help='log every request')
+	parser.add_argument('--benchmark', action='store_true', help='measure startup and per-request overhead and exit')
+	parser.add_argument('--count', type=int, default=200, help='corpus puzzles in the benchmark')
+	parser.add_argument('--variant', default='propagate', choices=VARIANTS, help='variant solved in the benchmark')
+	parser.add_argument('--clients', type=int, default=4, help='concurrent clients in the benchmark')
+	args = parser.parse_args()
+
+	if args.benchmark:
+		processes = args.processes
+		if processes is None:
+			processes = os.cpu_count() or 1
+		benchmark(args.count, args.variant, processes, args.clients, args.maxbatch, args.window)
+		return
+	server = SolveServer(args.host, args.port, args.processes, args.maxbatch, args.window, args.verbose, args.jobtimeout)
+	print('serving on http://%s:%d with %d workers' % (server.address[0], server.address[1], server.processes))
+	try:
+		server.serveforever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.close()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,910 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Solver Object
+#################################
+
+import random
+import threading
+import time
+from sudoku_bitset import BitsetDomains, puzzleboxsize, gridrows
+from sudoku_dlx import DancingLinks
+from sudoku_io import readpuzzles
+from sudoku_events import NODE, ASSIGN, WIPEOUT, BACKTRACK, SOLUTION
+from sudoku_nogoods import NogoodStore
+
+# Solver variants, the first three are the algorithms of sudoku.py
+# propagate assigns naked and hidden singles to a fixpoint at every node and branches on the cell with fewest candidates
+# dlx solves the exact cover encoding with dancing links (sudoku_dlx.py)
+# cbj is forward checking with conflict-directed backjumping and nogood recording (sudokusolvecbj)
+VARIANTS = ('basic', 'fwdcheck', 'heuristics', 'propagate', 'dlx', 'cbj')
+
+# Result statuses
+# solved: solution found
+# unsatisfiable: search ran out of values to try (the -1 returned by sudokusolve in sudoku.py)
+# budget exhausted: reached maximum iterations (the -2 returned by sudokusolve in sudoku.py) or the solve's deadline
+# cancelled: the solve's CancelToken was cancelled (-3)
+SOLVED = 'solved'
+UNSATISFIABLE = 'unsatisfiable'
+BUDGETEXHAUSTED = 'budget exhausted'
+CANCELLED = 'cancelled'
+STATUSES = {0: SOLVED, -1: UNSATISFIABLE, -2: BUDGETEXHAUSTED, -3: CANCELLED}
+
+# The node budget, deadline and cancel token of a solve are checked every CHECKEVERY iterations of the search, or
+# more often where iterations are slow (big grids, propagation) so that checks stay at most CHECKSECONDS apart
+# The budget itself is exact, the deadline and cancellation take effect at the next check
+CHECKEVERY = 256
+CHECKSECONDS = 0.005
+
+# Value orders of the propagate variant: increasing, decreasing or random
+VALUEORDERS = ('low', 'high', 'random')
+
+### CancelToken ###
+# Cancels the solves it is passed to from any thread: the solves return with status cancelled at their next check
+# event is the threading.Event (or multiprocessing Event, for solves in other processes) behind it, a new one by default
+class CancelToken:
+	def __init__(self, event=None):
+		if event is None:
+			event = threading.Event()
+		self.event = event
+
+	def cancel(self):
+		self.event.set()
+
+	def cancelled(self):
+		return self.event.is_set()
+
+### SolveResult ###
+# Returned by Solver.solve
+# solution is the solved grid (list of rows, None unless status is SOLVED)
+# assignments and backtracks are the callcounter and backtrackcounter of sudoku.py (the work done so far if the solve
+# was stopped) and elapsed the wall seconds the solve took
+class SolveResult:
+	def __init__(self, solution, status, assignments, backtracks, elapsed=0.0):
+		self.solution = solution
+		self.status = status
+		self.assignments = assignments
+		self.backtracks = backtracks
+		self.elapsed = elapsed
+
+	def __repr__(self):
+		return 'SolveResult(status=%r, assignments=%d, backtracks=%d, elapsed=%.6f)' % (self.status, self.assignments,
+			self.backtracks, self.elapsed)
+
+### Solver ###
+# Owns all search state that used to live in the module globals of sudoku.py, so there is nothing to reset between solves
+# One Solver runs one solve at a time, use one Solver per thread/task (or the solve function below) to solve concurrently
+# variant is one of VARIANTS, maxiter is the maximum iterations allowed before termination with failure (the node budget)
+# timeout is the wall seconds a solve may take before it stops as budget exhausted, None for no limit
+# solve can override both per call and take a CancelToken
+# boxes=False drops the box constraint and reproduces the row/column only solvers of sudoku.py
+# sink receives the search events of sudoku_events.py (sink.event(kind, depth, cell, value)), None for no events
+# The dlx variant reports no events
+# valueorder, seed and restartunit change the choices of the propagate variant (see sudokusolverestarts), the defaults
+# leave it as it is
+# nogoods is the capacity of the nogood store of the cbj variant (0 for no nogood recording) and nogoodsize the most
+# assignments a nogood may have to be stored
+class Solver:
+	def __init__(self, variant='heuristics', maxiter=10000, boxes=True, sink=None, timeout=None, valueorder='low',
+			seed=None, restartunit=0, nogoods=1024, nogoodsize=8):
+		if variant not in VARIANTS:
+			raise ValueError('unknown solver variant %r, expected one of %s' % (variant, ', '.join(VARIANTS)))
+		if valueorder not in VALUEORDERS:
+			raise ValueError('unknown value order %r, expected one of %s' % (valueorder, ', '.join(VALUEORDERS)))
+		self.restarting = valueorder != 'low' or seed is not None or restartunit > 0
+		if self.restarting and variant != 'propagate':
+			raise ValueError('valueorder, seed and restartunit only apply to the propagate variant')
+		self.variant = variant
+		self.maxiter = maxiter
+		self.boxes = boxes
+		self.sink = sink
+		self.timeout = timeout
+		self.valueorder = valueorder
+		self.seed = seed
+		self.restartunit = restartunit
+		self.nogoods = None
+		if variant == 'cbj' and nogoods > 0:
+			self.nogoods = NogoodStore(nogoods)
+		self.nogoodsize = nogoodsize
+		self.emit = None
+		self.callcounter = 0
+		self.backtrackcounter = 0
+		# restarts of the last solve (restartunit > 0 only)
+		self.restartcounter = 0
+		# levels skipped by backjumps in the last solve (cbj only)
+		self.jumpcounter = 0
+		# iterations left before the next checkpoint, and in the node budget after that
+		self.iterleft = 0
+		self.budgetleft = 0
+		# perf_counter time the current solve stops at (None for no deadline) and its CancelToken
+		self.deadline = None
+		self.cancel = None
+		# perf_counter time of the last check, the iterations since and the most iterations between two checks
+		self.lastcheck = 0.0
+		self.lastslice = 0
+		self.checkevery = CHECKEVERY
+		self.domains = None
+		# explicit search stack, one frame per cell, allocated on the first solve and reused by later solves of the same size
+		self.framer = []
+		self.framec = []
+		self.frameassign = []
+		self.frameinvalid = []
+		self.frametrail = []
+		self.frameconflict = []
+		# iterator over the values left to try at each depth (heuristics variant)
+		self.frameorder = []
+		# cells assigned so far (decisions and propagated), undone back to a frame's mark on backtrack
+		self.trail = []
+		# dancing links structure of the dlx variant, rebuilt only when the grid size changes
+		self.links = None
+
+	# solve puzzle (N rows of N values, 0 for unassigned, N = 4, 9, 16, 25, ..., or a Board) and return a SolveResult
+	# puzzle itself is left untouched
+	# timeout (seconds) and nodes (iterations) override the Solver's timeout and maxiter for this solve, cancel is a
+	# CancelToken that stops the solve when cancelled
+	def solve(self, puzzle, timeout=None, nodes=None, cancel=None):
+		return runsteps(self.solvesteps(puzzle, timeout, nodes, cancel))
+
+	### solvesteps ###
+	# The solve as a generator: it yields (None) just before every check of the limits, at most checkevery iterations
+	# apart, and returns the SolveResult (as the StopIteration value). Whoever drives it can do other work between two
+	# steps, e.g. let an event loop run (sudoku_async.py); a CancelToken cancelled in between stops it on the next step
+	# The search methods below are generators in the same way, solve drives them straight through with runsteps
+	def solvesteps(self, puzzle, timeout=None, nodes=None, cancel=None, checkevery=CHECKEVERY):
+		start = time.perf_counter()
+		self.startlimits(start, timeout, nodes, cancel, checkevery)
+		if self.variant == 'dlx':
+			return (yield from self.solvedlx(puzzle, start))
+		self.callcounter = 0
+		self.backtrackcounter = 0
+		self.restartcounter = 0
+		self.jumpcounter = 0
+		self.emit = None
+		if self.sink is not None:
+			self.emit = self.sink.event
+		self.domains = BitsetDomains(puzzle, self.boxes)
+		if self.domains.clash:
+			self.domains = None
+			self.cancel = None
+			return SolveResult(None, UNSATISFIABLE, 0, 0, time.perf_counter() - start)
+		cells = self.domains.size*self.domains.size
+		if len(self.framer) < cells:
+			self.framer = [0] * cells
+			self.framec = [0] * cells
+			self.frameassign = [0] * cells
+			self.frameinvalid = [0] * cells
+			self.frametrail = [0] * cells
+			self.frameconflict = [0] * cells
+			self.frameorder = [None] * cells
+		if self.variant == 'basic':
+			result = yield from self.sudokusolve(self.domains.findnextzero(0)[0])
+		elif self.variant == 'fwdcheck':
+			result = yield from self.sudokusolvefwdcheck(self.domains.findnextzero(0)[0])
+		elif self.variant == 'heuristics':
+			result = yield from self.sudokusolveheuristics()
+		elif self.variant == 'cbj':
+			result = yield from self.sudokusolvecbj()
+		elif self.restarting:
+			result = yield from self.sudokusolverestarts()
+		else:
+			result = yield from self.sudokusolvepropagate()
+		solution = None
+		if result == 0:
+			solution = self.domains.board.rows()
+		self.domains = None
+		self.cancel = None
+		return SolveResult(solution, STATUSES[result], self.callcounter, self.backtrackcounter, time.perf_counter() - start)
+
+	# dlx variant of solve, reports rows selected/taken back by the search as assignments/backtracks
+	def solvedlx(self, puzzle, start):
+		puzzle = gridrows(puzzle)
+		self.dlxlinks(puzzle)
+		result, self.callcounter, self.backtrackcounter, solution = yield from self.links.solvesteps(puzzle, self.iterleft,
+			self.checkpoint)
+		self.cancel = None
+		return SolveResult(solution, STATUSES[result], self.callcounter, self.backtrackcounter, time.perf_counter() - start)
+
+	# dancing links structure for the size of puzzle, built on first use and kept for later puzzles of that size
+	def dlxlinks(self, puzzle):
+		boxsize = puzzleboxsize(puzzle)
+		if self.links is None or self.links.boxsize != boxsize or self.links.boxes != self.boxes:
+			self.links = DancingLinks(boxsize, self.boxes)
+		return self.links
+
+	### Solution enumeration ###
+	# These search every solution of puzzle with the dancing links of the dlx variant, whatever the Solver's variant,
+	# and do not count towards maxiter or the solve limits. Low-clue puzzles have astronomically many solutions, so
+	# take them lazily and stop early, or pass a limit
+
+	# generator of the solutions of puzzle (each a new list of N rows), one at a time, stopping the search (and putting
+	# the links back) as soon as the caller stops taking them
+	# The generator keeps the Solver's links to itself while it is open (a solve, count or second enumeration on the
+	# same Solver meanwhile builds links of its own) and hands them back when it closes
+	def itersolutions(self, puzzle):
+		puzzle = gridrows(puzzle)
+		links = self.dlxlinks(puzzle)
+		self.links = None
+		steps = links.searchsolutions(puzzle)
+		try:
+			for depth in steps:
+				yield links.solutiongrid(puzzle, depth)
+		finally:
+			steps.close()
+			if self.links is None:
+				self.links = links
+
+	# number of solutions of puzzle, counting stops at limit (None to count them all)
+	def countsolutions(self, puzzle, limit=None):
+		puzzle = gridrows(puzzle)
+		steps = self.dlxlinks(puzzle).searchsolutions(puzzle)
+		count = 0
+		try:
+			for depth in steps:
+				count += 1
+				if count == limit:
+					break
+		finally:
+			steps.close()
+		return count
+
+	# True if puzzle has exactly one solution, the search stops at the second
+	def isunique(self, puzzle):
+		return self.countsolutions(puzzle, 2) == 1
+
+	### Limits ###
+	# The searches count iterleft down by one per iteration and call checkpoint when it reaches 0
+	# The first checkpoint comes after the first iteration (so a solve with an already cancelled token stops at once),
+	# later ones every checkevery iterations until the node budget is used up
+	def startlimits(self, start, timeout, nodes, cancel, checkevery=CHECKEVERY):
+		if timeout is None:
+			timeout = self.timeout
+		if nodes is None:
+			nodes = self.maxiter
+		self.deadline = None
+		if timeout is not None:
+			self.deadline = start + timeout
+		self.cancel = cancel
+		self.iterleft = 1
+		self.budgetleft = nodes - 1
+		self.lastcheck = start
+		self.lastslice = 1
+		self.checkevery = checkevery
+
+	# 0 < iterations until the next checkpoint if the search can go on (iterleft is set to it), otherwise the status
+	# to return: -2 when the node budget is used up or the deadline has passed, -3 when the solve was cancelled
+	def checkpoint(self):
+		if self.budgetleft <= 0:
+			return -2
+		if self.cancel is not None and self.cancel.cancelled():
+			return -3
+		iterations = self.checkevery
+		if self.deadline is not None or self.cancel is not None:
+			now = time.perf_counter()
+			if self.deadline is not None and now >= self.deadline:
+				return -2
+			# iterations that fit in CHECKSECONDS (and before the deadline) at the pace of the last ones
+			pertime = (now - self.lastcheck) / self.lastslice
+			seconds = CHECKSECONDS
+			if self.deadline is not None:
+				seconds = min(seconds, self.deadline - now)
+			if pertime > 0 and seconds < iterations*pertime:
+				iterations = int(seconds / pertime) + 1
+			self.lastcheck = now
+		self.iterleft = min(iterations, self.budgetleft)
+		self.budgetleft -= self.iterleft
+		self.lastslice = self.iterleft
+		return self.iterleft
+
+	### Sudoku Solver - Basic Backtracking Search ###
+	# Same search as sudokusolve in sudoku.py, returns 0 (solved), -1 (no valid assignment) or -2 (maximum iterations)
+	# The recursion is replaced by an explicit stack: depth d of the stack holds the cell (framer[d],framec[d]) that the
+	# d-th nested sudokusolve call would be filling, the value it assigned and its invalid mask. A child returning -1
+	# pops back to its parent, which marks its value invalid and tries again exactly as the recursive version does
+	def sudokusolve(self, nextzero):
+		domains = self.domains
+		size = domains.size
+		emit = self.emit
+		framer = self.framer
+		framec = self.framec
+		frameassign = self.frameassign
+		frameinvalid = self.frameinvalid
+		nextpt = domains.findnextzero(nextzero)
+		if nextpt[0] == -1 and nextpt[1] == -1:
+			if emit is not None:
+				emit(SOLUTION, 0, -1, 0)
+			return 0
+		depth = 0
+		framer[0] = nextpt[0]
+		framec[0] = nextpt[1]
+		frameinvalid[0] = 0
+		if emit is not None:
+			emit(NODE, 0, framer[0]*size + framec[0], 0)
+		while True:
+			self.iterleft -= 1
+			if self.iterleft == 0:
+				yield
+				stop = self.checkpoint()
+				if stop < 0:
+					return stop
+			nextptr = framer[depth]
+			nextptc = framec[depth]
+			assignment, invalid = domains.findnextvalid(nextptr, nextptc, frameinvalid[depth])
+			domains.setcell(nextptr, nextptc, assignment)
+			if assignment == 0:
+				# no valid assignment, return -1 to the parent (or the caller if this is the top of the stack)
+				if depth == 0:
+					return -1
+				depth -= 1
+				frameinvalid[depth] |= 1 << (frameassign[depth]-1)
+				self.backtrackcounter += 1
+				if emit is not None:
+					emit(BACKTRACK, depth, framer[depth]*size + framec[depth], frameassign[depth])
+				continue
+			self.callcounter += 1
+			if emit is not None:
+				emit(ASSIGN, depth, nextptr*size + nextptc, assignment)
+			nextpt = domains.findnextzero(nextptr)
+			if nextpt[0] == -1 and nextpt[1] == -1:
+				if emit is not None:
+					emit(SOLUTION, depth, nextptr*size + nextptc, assignment)
+				return 0
+			frameinvalid[depth] = invalid
+			frameassign[depth] = assignment
+			depth += 1
+			framer[depth] = nextpt[0]
+			framec[depth] = nextpt[1]
+			frameinvalid[depth] = 0
+			if emit is not None:
+				emit(NODE, depth, framer[depth]*size + framec[depth], 0)
+
+	### Sudoku Solver - Forward Checking ###
+	# Same search as sudokusolvefwdcheck in sudoku.py, on the same explicit stack as sudokusolve
+	# frametrail[d] is the length of domains.marks before the forward checking of the value at depth d, undoing back to
+	# it takes back that forward checking and every mark set below it, then the value itself is marked invalid
+	def sudokusolvefwdcheck(self, nextzero):
+		domains = self.domains
+		size = domains.size
+		emit = self.emit
+		framer = self.framer
+		framec = self.framec
+		frameassign = self.frameassign
+		frametrail = self.frametrail
+		nextpt = domains.findnextzero(nextzero)
+		if nextpt[0] == -1 and nextpt[1] == -1:
+			if emit is not None:
+				emit(SOLUTION, 0, -1, 0)
+			return 0
+		depth = 0
+		framer[0] = nextpt[0]
+		framec[0] = nextpt[1]
+		if emit is not None:
+			emit(NODE, 0, framer[0]*size + framec[0], 0)
+		while True:
+			self.iterleft -= 1
+			if self.iterleft == 0:
+				yield
+				stop = self.checkpoint()
+				if stop < 0:
+					return stop
+			nextptr = framer[depth]
+			nextptc = framec[depth]
+			assignment = domains.findnextvalidfwdcheck(nextptr, nextptc)
+			domains.setcell(nextptr, nextptc, assignment)
+			if assignment == 0:
+				if depth == 0:
+					return -1
+				# child found no valid assignment - parent undoes its forward checking and tries its next value
+				depth -= 1
+				domains.undomarks(frametrail[depth])
+				domains.markinvalid(framer[depth], framec[depth], frameassign[depth])
+				self.backtrackcounter += 1
+				if emit is not None:
+					emit(BACKTRACK, depth, framer[depth]*size + framec[depth], frameassign[depth])
+				continue
+			frametrail[depth] = len(domains.marks)
+			if domains.forwardcheck(nextptr, nextptc, assignment) == 0:
+				self.callcounter += 1
+				if emit is not None:
+					emit(ASSIGN, depth, nextptr*size + nextptc, assignment)
+				nextpt = domains.findnextzero(nextptr)
+				if nextpt[0] == -1 and nextpt[1] == -1:
+					if emit is not None:
+						emit(SOLUTION, depth, nextptr*size + nextptc, assignment)
+					return 0
+				frameassign[depth] = assignment
+				depth += 1
+				framer[depth] = nextpt[0]
+				framec[depth] = nextpt[1]
+				if emit is not None:
+					emit(NODE, depth, framer[depth]*size + framec[depth], 0)
+			else:
+				# forward checking failed
+				domains.undomarks(frametrail[depth])
+				domains.markinvalid(nextptr, nextptc, assignment)
+				self.backtrackcounter += 1
+				if emit is not None:
+					emit(WIPEOUT, depth, nextptr*size + nextptc, assignment)
+					emit(BACKTRACK, depth, nextptr*size + nextptc, assignment)
+
+	### Sudoku Solver - Forward Checking + Heuristics ###
+	# Same search as sudokusolveheuristics in sudoku.py, on the same explicit stack as sudokusolve
+	# The values of a node are ordered once as it is entered (domains.ordervalues), frameorder[d] hands them out
+	def sudokusolveheuristics(self):
+		domains = self.domains
+		size = domains.size
+		emit = self.emit
+		framer = self.framer
+		framec = self.framec
+		frameassign = self.frameassign
+		frametrail = self.frametrail
+		frameorder = self.frameorder
+		nextpt = domains.findnextzeroheuristics()
+		if nextpt[0] == -1 and nextpt[1] == -1:
+			if emit is not None:
+				emit(SOLUTION, 0, -1, 0)
+			return 0
+		depth = 0
+		framer[0] = nextpt[0]
+		framec[0] = nextpt[1]
+		frameorder[0] = iter(domains.ordervalues(nextpt[0], nextpt[1]))
+		if emit is not None:
+			emit(NODE, 0, framer[0]*size + framec[0], 0)
+		while True:
+			self.iterleft -= 1
+			if self.iterleft == 0:
+				yield
+				stop = self.checkpoint()
+				if stop < 0:
+					return stop
+			nextptr = framer[depth]
+			nextptc = framec[depth]
+			assignment = next(frameorder[depth], 0)
+			domains.setcell(nextptr, nextptc, assignment)
+			if assignment == 0:
+				if depth == 0:
+					return -1
+				depth -= 1
+				domains.undomarks(frametrail[depth])
+				domains.markinvalid(framer[depth], framec[depth], frameassign[depth])
+				self.backtrackcounter += 1
+				if emit is not None:
+					emit(BACKTRACK, depth, framer[depth]*size + framec[depth], frameassign[depth])
+				continue
+			frametrail[depth] = len(domains.marks)
+			if domains.forwardcheck(nextptr, nextptc, assignment) == 0:
+				self.callcounter += 1
+				if emit is not None:
+					emit(ASSIGN, depth, nextptr*size + nextptc, assignment)
+				nextpt = domains.findnextzeroheuristics()
+				if nextpt[0] == -1 and nextpt[1] == -1:
+					if emit is not None:
+						emit(SOLUTION, depth, nextptr*size + nextptc, assignment)
+					return 0
+				frameassign[depth] = assignment
+				depth += 1
+				framer[depth] = nextpt[0]
+				framec[depth] = nextpt[1]
+				frameorder[depth] = iter(domains.ordervalues(nextpt[0], nextpt[1]))
+				if emit is not None:
+					emit(NODE, depth, framer[depth]*size + framec[depth], 0)
+			else:
+				domains.undomarks(frametrail[depth])
+				domains.markinvalid(nextptr, nextptc, assignment)
+				self.backtrackcounter += 1
+				if emit is not None:
+					emit(WIPEOUT, depth, nextptr*size + nextptc, assignment)
+					emit(BACKTRACK, depth, nextptr*size + nextptc, assignment)
+
+	### Sudoku Solver - Propagation to Fixpoint ###
+	# Propagates naked/hidden singles before branching and after every assignment. A failed propagation counts as a
+	# backtrack straight away, without descending. frameinvalid[d] holds the values still to try for the cell of depth d
+	# and frametrail[d] the trail length before its current value, so undoing a value also undoes everything it forced
+	def sudokusolvepropagate(self):
+		domains = self.domains
+		size = domains.size
+		emit = self.emit
+		geo = domains.geo
+		framer = self.framer
+		framec = self.framec
+		frameassign = self.frameassign
+		frameinvalid = self.frameinvalid
+		frametrail = self.frametrail
+		trail = self.trail
+		del trail[:]
+		if domains.propagate(trail) == 0:
+			if emit is not None:
+				emit(WIPEOUT, 0, -1, 0)
+			return -1
+		nextpt = domains.findmostconstrained()
+		if nextpt == -1:
+			if emit is not None:
+				emit(SOLUTION, 0, -1, 0)
+			return 0
+		depth = 0
+		framer[0] = geo.cellrow[nextpt]
+		framec[0] = geo.cellcol[nextpt]
+		frameinvalid[0] = domains.fullmask & ~domains.conflicts(framer[0], framec[0])
+		if emit is not None:
+			emit(NODE, 0, nextpt, 0)
+		while True:
+			self.iterleft -= 1
+			if self.iterleft == 0:
+				yield
+				stop = self.checkpoint()
+				if stop < 0:
+					return stop
+			remaining = frameinvalid[depth]
+			if remaining == 0:
+				# no values left for this cell, the parent undoes its value and tries the next one
+				if depth == 0:
+					return -1
+				depth -= 1
+				domains.undo(trail, frametrail[depth])
+				self.backtrackcounter += 1
+				if emit is not None:
+					emit(BACKTRACK, depth, framer[depth]*size + framec[depth], frameassign[depth])
+				continue
+			low = remaining & -remaining
+			frameinvalid[depth] = remaining ^ low
+			assignment = low.bit_length()
+			frameassign[depth] = assignment
+			frametrail[depth] = len(trail)
+			domains.setcell(framer[depth], framec[depth], assignment)
+			trail.append(framer[depth]*size + framec[depth])
+			if domains.propagate(trail) == 1:
+				self.callcounter += 1
+				if emit is not None:
+					emit(ASSIGN, depth, framer[depth]*size + framec[depth], assignment)
+				nextpt = domains.findmostconstrained()
+				if nextpt == -1:
+					if emit is not None:
+						emit(SOLUTION, depth, framer[depth]*size + framec[depth], assignment)
+					return 0
+				depth += 1
+				framer[depth] = geo.cellrow[nextpt]
+				framec[depth] = geo.cellcol[nextpt]
+				frameinvalid[depth] = domains.fullmask & ~domains.conflicts(framer[depth], framec[depth])
+				if emit is not None:
+					emit(NODE, depth, nextpt, 0)
+			else:
+				# propagation failed
+				domains.undo(trail, frametrail[depth])
+				self.backtrackcounter += 1
+				if emit is not None:
+					emit(WIPEOUT, depth, framer[depth]*size + framec[depth], assignment)
+					emit(BACKTRACK, depth, framer[depth]*size + framec[depth], assignment)
+
+	### Sudoku Solver - Propagation with Orderings and Restarts ###
+	# sudokusolvepropagate with the choices it leaves open made by the Solver's options, so that differently seeded and
+	# ordered solvers take different paths through the same puzzle (for the portfolios of sudoku_portfolio.py)
+	# valueorder   values of a cell tried in increasing ('low'), decreasing ('high') or random ('random') order
+	# seed         None keeps the first of the cells with fewest candidates, a number picks one of them at random. The
+	#              random choices restart from the seed (0 if None) on every solve, so results are repeatable
+	# restartunit  the k-th run of the search goes back to the root after restartunit*luby(k) backtracks and starts
+	#              over, counted in restartcounter (0 for no restarts). A run that tries every value at the root has
+	#              searched the whole tree, and the runs get longer without bound, so unsatisfiable puzzles still end
+	def sudokusolverestarts(self):
+		domains = self.domains
+		size = domains.size
+		emit = self.emit
+		geo = domains.geo
+		framer = self.framer
+		framec = self.framec
+		frameassign = self.frameassign
+		frameinvalid = self.frameinvalid
+		frametrail = self.frametrail
+		trail = self.trail
+		rng = random.Random(self.seed or 0)
+		randomcell = self.seed is not None
+		valueorder = self.valueorder
+		restartunit = self.restartunit
+		run = 1
+		runbacktracks = 0
+		del trail[:]
+		if domains.propagate(trail) == 0:
+			if emit is not None:
+				emit(WIPEOUT, 0, -1, 0)
+			return -1
+		rootmark = len(trail)
+		depth = -1
+		while True:
+			if depth == -1:
+				# start a run from the root
+				if randomcell:
+					nextpt = domains.findmostconstrainedrandom(rng)
+				else:
+					nextpt = domains.findmostconstrained()
+				if nextpt == -1:
+					if emit is not None:
+						emit(SOLUTION, 0, -1, 0)
+					return 0
+				depth = 0
+				framer[0] = geo.cellrow[nextpt]
+				framec[0] = geo.cellcol[nextpt]
+				frameinvalid[0] = domains.fullmask & ~domains.conflicts(framer[0], framec[0])
+				if emit is not None:
+					emit(NODE, 0, nextpt, 0)
+			self.iterleft -= 1
+			if self.iterleft == 0:
+				yield
+				stop = self.checkpoint()
+				if stop < 0:
+					return stop
+			remaining = frameinvalid[depth]
+			if remaining == 0:
+				if depth == 0:
+					return -1
+				depth -= 1
+				domains.undo(trail, frametrail[depth])
+				self.backtrackcounter += 1
+				runbacktracks += 1
+				if emit is not None:
+					emit(BACKTRACK, depth, framer[depth]*size + framec[depth], frameassign[depth])
+			else:
+				if valueorder == 'low':
+					low = remaining & -remaining
+				elif valueorder == 'high':
+					low = 1 << (remaining.bit_length() - 1)
+				else:
+					low = remaining
+					for k in range(rng.randrange(remaining.bit_count())):
+						low &= low - 1
+					low &= -low
+				frameinvalid[depth] = remaining ^ low
+				assignment = low.bit_length()
+				frameassign[depth] = assignment
+				frametrail[depth] = len(trail)
+				domains.setcell(framer[depth], framec[depth], assignment)
+				trail.append(framer[depth]*size + framec[depth])
+				if domains.propagate(trail) == 1:
+					self.callcounter += 1
+					if emit is not None:
+						emit(ASSIGN, depth, framer[depth]*size + framec[depth], assignment)
+					if randomcell:
+						nextpt = domains.findmostconstrainedrandom(rng)
+					else:
+						nextpt = domains.findmostconstrained()
+					if nextpt == -1:
+						if emit is not None:
+							emit(SOLUTION, depth, framer[depth]*size + framec[depth], assignment)
+						return 0
+					depth += 1
+					framer[depth] = geo.cellrow[nextpt]
+					framec[depth] = geo.cellcol[nextpt]
+					frameinvalid[depth] = domains.fullmask & ~domains.conflicts(framer[depth], framec[depth])
+					if emit is not None:
+						emit(NODE, depth, nextpt, 0)
+					continue
+				domains.undo(trail, frametrail[depth])
+				self.backtrackcounter += 1
+				runbacktracks += 1
+				if emit is not None:
+					emit(WIPEOUT, depth, framer[depth]*size + framec[depth], assignment)
+					emit(BACKTRACK, depth, framer[depth]*size + framec[depth], assignment)
+			if restartunit > 0 and runbacktracks >= restartunit*luby(run):
+				domains.undo(trail, rootmark)
+				self.restartcounter += 1
+				run += 1
+				runbacktracks = 0
+				depth = -1
+
+	### Sudoku Solver - Forward Checking with Conflict-Directed Backjumping ###
+	# Forward checking on the candidates left by the row/column/box values, branching on the cell with fewest candidates
+	# Every decision records at frameconflict[d] the depths of earlier decisions that caused its values to fail (a bitmask
+	# over depths): for a value that wiped out a peer, the decisions holding the peer's other values; for a value whose
+	# subtree failed, the conflict set that subtree jumped back with. Once the cell at depth d has no values left, its
+	# conflict set (plus the decisions that ruled out values of the cell beforehand) explains the failure: the search
+	# jumps straight back to the deepest decision in it, undoing everything in between, instead of to depth d-1
+	# The decisions of that conflict set cannot all hold in a solution. Nogoods of at most nogoodsize of them are kept in
+	# the Solver's NogoodStore (cleared every solve), and an assignment completing a stored nogood fails at once
+	# Given values are never in a conflict set, they hold in every solution
+	# Values are tried least constraining first as in the heuristics variant, counted from the row/column/box values
+	# (cbj keeps no invalid marks): fewest unassigned peers that still have the value as a candidate, ties lowest first
+	# frameorder[d] iterates the values left to try for the cell of depth d
+	def sudokusolvecbj(self):
+		domains = self.domains
+		size = domains.size
+		emit = self.emit
+		geo = domains.geo
+		peers = geo.peers
+		values = domains.values
+		fullmask = domains.fullmask
+		framer = self.framer
+		framec = self.framec
+		frameassign = self.frameassign
+		frameorder = self.frameorder
+		frameconflict = self.frameconflict
+		nogoods = self.nogoods
+		nogoodsize = self.nogoodsize
+		if nogoods is not None:
+			nogoods.clear()
+		# digits ruled out for every cell by the givens alone, and the depth of every decided cell (-1 otherwise)
+		givenconflicts = [domains.conflicts(geo.cellrow[i], geo.cellcol[i]) for i in range(size*size)]
+		celldepth = [-1] * (size*size)
+
+		# bitmask of the depths of the decisions that rule out digits of cell i (besides the givens)
+		def explain(i):
+			depths = 0
+			given = givenconflicts[i]
+			for j in peers[i]:
+				if celldepth[j] >= 0 and given & (1 << (values[j]-1)) == 0:
+					depths |= 1 << celldepth[j]
+			return depths
+
+		# candidates of cell i, least constraining first
+		def ordervalues(i):
+			free = fullmask & ~domains.conflicts(geo.cellrow[i], geo.cellcol[i])
+			counts = [0] * size
+			for j in peers[i]:
+				if values[j] == 0:
+					shared = free & ~domains.conflicts(geo.cellrow[j], geo.cellcol[j])
+					while shared != 0:
+						low = shared & -shared
+						shared ^= low
+						counts[low.bit_length() - 1] += 1
+			scored = []
+			while free != 0:
+				low = free & -free
+				free ^= low
+				k = low.bit_length() - 1
+				scored.append(counts[k]*size + k)
+			scored.sort()
+			return iter([score % size + 1 for score in scored])
+
+		# unassigned cell with fewest candidates, ties to the one with most unassigned cells on its row and column as
+		# in the heuristics variant, -1 if every cell is assigned
+		def mostconstrained():
+			rowempty = domains.rowempty
+			colempty = domains.colempty
+			best = -1
+			bestcount = size + 1
+			bestdegree = -1
+			for i in range(size*size):
+				if values[i] == 0:
+					r = geo.cellrow[i]
+					c = geo.cellcol[i]
+					count = (fullmask & ~domains.conflicts(r, c)).bit_count()
+					if count > bestcount:
+						continue
+					degree = (rowempty[r] | colempty[c]).bit_count()
+					if count < bestcount or degree > bestdegree:
+						best = i
+						bestcount = count
+						bestdegree = degree
+			return best
+
+		for i in range(size*size):
+			if values[i] == 0 and givenconflicts[i] == fullmask:
+				if emit is not None:
+					emit(WIPEOUT, 0, -1, 0)
+				return -1
+		nextpt = mostconstrained()
+		if nextpt == -1:
+			if emit is not None:
+				emit(SOLUTION, 0, -1, 0)
+			return 0
+		depth = 0
+		framer[0] = geo.cellrow[nextpt]
+		framec[0] = geo.cellcol[nextpt]
+		frameorder[0] = ordervalues(nextpt)
+		frameconflict[0] = 0
+		if emit is not None:
+			emit(NODE, 0, nextpt, 0)
+		while True:
+			self.iterleft -= 1
+			if self.iterleft == 0:
+				yield
+				stop = self.checkpoint()
+				if stop < 0:
+					return stop
+			assignment = next(frameorder[depth], 0)
+			if assignment == 0:
+				# no values left: jump back to the deepest decision of the conflict set
+				conflict = frameconflict[depth] | explain(framer[depth]*size + framec[depth])
+				if conflict == 0:
+					return -1
+				back = conflict.bit_length() - 1
+				if nogoods is not None and conflict.bit_count() <= nogoodsize:
+					nogood = []
+					rest = conflict
+					while rest != 0:
+						low = rest & -rest
+						rest ^= low
+						k = low.bit_length() - 1
+						nogood.append((framer[k]*size + framec[k])*size + frameassign[k] - 1)
+					nogoods.add(tuple(sorted(nogood)))
+				for k in range(depth - 1, back - 1, -1):
+					domains.setcell(framer[k], framec[k], 0)
+					celldepth[framer[k]*size + framec[k]] = -1
+				frameconflict[back] |= conflict ^ (1 << back)
+				self.jumpcounter += depth - 1 - back
+				self.backtrackcounter += 1
+				depth = back
+				if emit is not None:
+					emit(BACKTRACK, depth, framer[depth]*size + framec[depth], frameassign[depth])
+				continue
+			nextptr = framer[depth]
+			nextptc = framec[depth]
+			cell = nextptr*size + nextptc
+			frameassign[depth] = assignment
+			domains.setcell(nextptr, nextptc, assignment)
+			celldepth[cell] = depth
+			# forward check: a peer left with no candidates fails the value, the decisions behind its other
+			# candidates join the conflict set
+			failed = 0
+			for j in peers[cell]:
+				if values[j] == 0 and domains.conflicts(geo.cellrow[j], geo.cellcol[j]) == fullmask:
+					frameconflict[depth] |= explain(j) & ~(1 << depth)
+					failed = 1
+					break
+			if failed == 0 and nogoods is not None:
+				nogood = nogoods.violated(cell*size + assignment - 1, values, size)
+				if nogood is not None:
+					for literal in nogood:
+						frameconflict[depth] |= 1 << celldepth[literal // size]
+					frameconflict[depth] &= ~(1 << depth)
+					failed = 1
+			if failed == 1:
+				domains.setcell(nextptr, nextptc, 0)
+				celldepth[cell] = -1
+				self.backtrackcounter += 1
+				if emit is not None:
+					emit(WIPEOUT, depth, cell, assignment)
+					emit(BACKTRACK, depth, cell, assignment)
+				continue
+			self.callcounter += 1
+			if emit is not None:
+				emit(ASSIGN, depth, cell, assignment)
+			nextpt = mostconstrained()
+			if nextpt == -1:
+				if emit is not None:
+					emit(SOLUTION, depth, cell, assignment)
+				return 0
+			depth += 1
+			framer[depth] = geo.cellrow[nextpt]
+			framec[depth] = geo.cellcol[nextpt]
+			frameorder[depth] = ordervalues(nextpt)
+			frameconflict[depth] = 0
+			if emit is not None:
+				emit(NODE, depth, nextpt, 0)
+
+# k-th term (from 1) of the luby sequence 1 1 2 1 1 2 4 1 1 2 1 1 2 4 8 ..., the restart lengths of sudokusolverestarts
+def luby(k):
+	while True:
+		# 2**bits - 1 is the first position at least k, where the term is 2**(bits-1)
+		bits = k.bit_length()
+		if k == (1 << bits) - 1:
+			return 1 << (bits - 1)
+		# otherwise the sequence up to k repeats from after position 2**(bits-1) - 1
+		k -= (1 << (bits - 1)) - 1
+
+# drive a generator of solvesteps (or of a search method) to the end and return its result
+def runsteps(steps):
+	while True:
+		try:
+			next(steps)
+		except StopIteration as stop:
+			return stop.value
+
+# solve puzzle with a fresh Solver, safe to call from many threads at once
+def solve(puzzle, variant='heuristics', maxiter=10000, boxes=True, timeout=None, cancel=None):
+	return Solver(variant, maxiter, boxes, timeout=timeout).solve(puzzle, cancel=cancel)
+
+# solutions of puzzle (see Solver.itersolutions), counted up to limit, and whether there is exactly one, with a
+# fresh Solver each
+def itersolutions(puzzle, boxes=True):
+	return Solver('dlx', boxes=boxes).itersolutions(puzzle)
+
+def countsolutions(puzzle, limit=None, boxes=True):
+	return Solver('dlx', boxes=boxes).countsolutions(puzzle, limit)
+
+def isunique(puzzle, boxes=True):
+	return Solver('dlx', boxes=boxes).isunique(puzzle)
+
+### readpuzzle ###
+# Read the first puzzle of a file in either format of sudoku_io.py (a .sd file: N lines of N whitespace separated values,
+# 0 for unassigned, N = 4, 9, 16, 25, ...), anything after it is ignored
+def readpuzzle(path):
+	with open(path, 'rb') as f:
+		for kind, grid in readpuzzles(f):
+			return grid
+	raise ValueError('%s holds no puzzle' % path)
@@ -0,0 +1,23 @@
+#################################
+# Ayden Ellsmere
+# Sudoku CSP Solver - Regression Checks
+#################################
+
+# usage: python -m pytest test_solver.py
+
+from sudoku_solver import Solver, SOLVED, readpuzzle
+
+# a solve, a count and a second enumeration on a Solver whose itersolutions generator is still open must each get
+# links of their own, not the ones the open enumeration has covered
+def test_enumeration_open_during_other_calls():
+	empty = [[0] * 4 for r in range(4)]
+	for variant in ('dlx', 'heuristics'):
+		solver = Solver(variant)
+		solutions = solver.itersolutions(empty)
+		first = next(solutions)
+		assert solver.solve(readpuzzle('problems/1/1.sd')).status == SOLVED
+		assert solver.countsolutions(empty) == 288
+		assert sum(1 for grid in solver.itersolutions(empty)) == 288
+		assert 1 + sum(1 for grid in solutions) == 288
+		assert first in solver.itersolutions(empty)
+		assert solver.countsolutions(empty) == 288